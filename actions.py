@@ -0,0 +1,105 @@
+"""
+Fixed discrete action space over SpiderEngine moves
+
+Action (source * MAX_RUN + count - 1) * 10 + target moves the top count cards of
+play pile source onto play pile target. The last action, DEAL_ACTION, deals a
+row from the stock. Ids whose source and target are the same are never legal.
+"""
+import random
+import time
+
+import numpy as np
+
+import engine
+
+PLAY_PILES = len(engine.TABLEAU)
+# Longest run that can be moved: one whole suit
+MAX_RUN = engine.SUIT_LENGTH
+DEAL_ACTION = PLAY_PILES * MAX_RUN * PLAY_PILES
+ACTION_COUNT = DEAL_ACTION + 1
+
+# Source pile, number of cards and target pile of every action id
+ACTION_SOURCE = [action // (MAX_RUN * PLAY_PILES) for action in range(DEAL_ACTION)] + [engine.STOCK]
+ACTION_RUN_LENGTH = [action // PLAY_PILES % MAX_RUN + 1 for action in range(DEAL_ACTION)] + [0]
+ACTION_TARGET = [action % PLAY_PILES for action in range(DEAL_ACTION)] + [engine.STOCK]
+
+
+def action_id(source, count, target):
+    """ Id of the action moving count cards from source to target """
+    return (source * MAX_RUN + count - 1) * PLAY_PILES + target
+
+
+def move_to_action(game, move):
+    """ Action id of an engine move in this position """
+    source, index, target = move
+    if source == engine.STOCK:
+        return DEAL_ACTION
+    return action_id(source, len(game.piles[source]) - index, target)
+
+
+def action_to_move(game, action):
+    """ Engine move of an action id in this position """
+    if action == DEAL_ACTION:
+        return engine.DEAL
+    source = ACTION_SOURCE[action]
+    return source, len(game.piles[source]) - ACTION_RUN_LENGTH[action], ACTION_TARGET[action]
+
+
+def legal_actions(game):
+    """ Ids of every legal action, from the engine's move generation caches like legal_moves() """
+    actions = []
+    piles = game.piles
+    accepts = game.accepts
+    empty = game.empty
+    value = engine.VALUE
+    for source in engine.TABLEAU:
+        pile = piles[source]
+        length = len(pile)
+        others = ~(1 << source)
+        base = (source * MAX_RUN + length - 1) * PLAY_PILES
+        for index in range(game.run_starts[source], length):
+            targets = (accepts[value[pile[index]]] | empty) & others
+            # Moving from index takes length - index cards
+            action = base - index * PLAY_PILES
+            while targets:
+                lowest = targets & -targets
+                actions.append(action + lowest.bit_length() - 1)
+                targets ^= lowest
+    if piles[engine.STOCK]:
+        actions.append(DEAL_ACTION)
+    return actions
+
+
+def legal_mask(game, out=None):
+    """ Fill a bool array of ACTION_COUNT flags with the legal actions, a new one if out is None """
+    if out is None:
+        out = np.zeros(ACTION_COUNT, dtype=bool)
+    else:
+        out[:] = False
+    out[legal_actions(game)] = True
+    return out
+
+
+def benchmark(positions=500, repeat=200, seed=0):
+    """ Time filling a preallocated mask on random mid-game positions """
+    rng = random.Random(seed)
+    games = []
+    for game_no in range(positions):
+        game = engine.SpiderEngine(engine.shuffled_deck(game_no))
+        for x in range(rng.randrange(20, 80)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+            game.apply(rng.choice(moves))
+        games.append(game)
+    mask = np.zeros(ACTION_COUNT, dtype=bool)
+    start = time.perf_counter()
+    for x in range(repeat):
+        for game in games:
+            legal_mask(game, mask)
+    elapsed = time.perf_counter() - start
+    print(f"{'legal_mask':>12} {elapsed / (repeat * positions) * 1e6:8.2f} us/state")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,131 @@
+"""
+Hint and dead-game analysis in a background process, so the frame loop never waits
+
+The view sends a snapshot() of the position with a request and keeps
+playing. Every request belongs to the generation current when it was made.
+new_generation(), called whenever the position changes, drops the requests not
+started yet and makes poll() ignore results of older generations.
+A request that fails comes back from poll() with its error set and no result.
+If a worker process dies, the next request starts a new one.
+"""
+import multiprocessing
+import queue
+import time
+from collections import namedtuple
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import engine
+import hints
+import settings
+import solver
+
+HINT = "hint"
+SOLVE = "solve"
+
+# A finished request: its kind, its generation and what the analysis returned,
+# or the exception it raised instead
+Analysis = namedtuple("Analysis", ["kind", "generation", "result", "error"], defaults=[None])
+
+# Set once per worker process by _init_worker
+_hint_engine = None
+
+
+def _init_worker():
+    """ Runs once when the worker process starts """
+    global _hint_engine
+    _hint_engine = hints.HintEngine()
+
+
+def _hint(state, time_limit):
+    return _hint_engine.hint(engine.SpiderEngine.from_snapshot(state), time_limit)
+
+
+def _solve(state, max_nodes, time_limit):
+    return solver.solve(engine.SpiderEngine.from_snapshot(state), max_nodes, time_limit)
+
+
+class AnalysisService:
+    """
+    Two worker processes, one for hint searches and one for solver runs, so a
+    long solve never holds up a hint. Each runs its requests in order.
+    """
+
+    def __init__(self):
+        self.executors = {kind: self.new_executor(kind) for kind in (HINT, SOLVE)}
+        self.results = queue.Queue()
+        self.generation = 0
+        self.pending = []
+
+    @staticmethod
+    def new_executor(kind):
+        # Spawned, not forked: the view's process has a GL context and threads
+        context = multiprocessing.get_context("spawn")
+        initializer = _init_worker if kind == HINT else None
+        return ProcessPoolExecutor(1, context, initializer=initializer)
+
+    def new_generation(self):
+        """ The position changed: cancel what hasn't started and ignore older results """
+        self.generation += 1
+        for future in self.pending:
+            future.cancel()
+        self.pending = []
+
+    def request_hint(self, game, time_limit=settings.HINT_TIME):
+        """ Rank the moves of a position in the background """
+        self.submit(HINT, _hint, game.snapshot(), time_limit)
+
+    def request_solve(self, game, max_nodes=settings.DEAD_GAME_NODES, time_limit=settings.DEAD_GAME_TIME):
+        """ Find out in the background whether a position can still be won """
+        self.submit(SOLVE, _solve, game.snapshot(), max_nodes, time_limit)
+
+    def submit(self, kind, function, *args):
+        generation = self.generation
+        try:
+            future = self.executors[kind].submit(function, *args)
+        except BrokenProcessPool:
+            # The worker died, e.g. killed by the OS: start another one
+            self.executors[kind] = self.new_executor(kind)
+            future = self.executors[kind].submit(function, *args)
+        self.pending = [pending for pending in self.pending if not pending.done()]
+        self.pending.append(future)
+
+        def deliver(future):
+            try:
+                self.results.put(Analysis(kind, generation, future.result()))
+            except CancelledError:
+                pass
+            except Exception as error:
+                self.results.put(Analysis(kind, generation, None, error))
+        future.add_done_callback(deliver)
+
+    def poll(self):
+        """ Finished analyses of the current position, without waiting """
+        analyses = []
+        while True:
+            try:
+                analysis = self.results.get_nowait()
+            except queue.Empty:
+                return analyses
+            if analysis.generation == self.generation:
+                analyses.append(analysis)
+
+    def warm_up(self):
+        """ Start the worker processes before they are needed """
+        for executor in self.executors.values():
+            executor.submit(time.sleep, 0).result()
+
+    def close(self):
+        for executor in self.executors.values():
+            executor.shutdown(cancel_futures=True)
+
+
+_service = None
+
+
+def shared_service():
+    """ The AnalysisService every view uses, started on first use """
+    global _service
+    if _service is None:
+        _service = AnalysisService()
+    return _service
@@ -0,0 +1,293 @@
+"""
+Benchmark suite for the rules engine's hot paths, with a history of results
+
+Every case runs over a fixed corpus of seeded positions in four phases:
+
+    early   fresh deals
+    mid     20 to 60 random useful moves in, with cards left in the stock
+    late    the stock dealt out
+    empty   two or more empty play piles, taken from solved one-suit deals
+
+A case is timed like asv does: enough loops to make a sample last SAMPLE_TIME,
+the best of a few samples, reported in ns per operation. Its peak memory comes
+from one more pass over the corpus under tracemalloc. Random games are reported
+in games/sec, and the import time of the main modules (python -X importtime in
+a fresh interpreter) in ms. The rules modules must import without the window,
+GL or Gym packages: a run lists any that do.
+
+Nothing here needs a display. Each run is appended as one JSON line to a history
+file, and compared with the last run on the same machine, so that a slower
+engine shows up in review:
+
+    python benchmarks.py                  run and append to benchmarks.jsonl
+    python benchmarks.py --quick          smaller corpus, fewer samples
+    python benchmarks.py --no-save        run without touching the history
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import engine
+import rollout
+import solver
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY = os.path.join(HERE, "benchmarks.jsonl")
+PHASES = ["early", "mid", "late", "empty"]
+SAMPLE_TIME = 0.2
+# Slowdown against the last run that gets flagged
+REGRESSION = 1.20
+# Modules whose import is timed, and those of them that must not load UI_PACKAGES
+IMPORTS = ["engine", "solver", "actions", "analysis", "game", "spider_env", "views"]
+HEADLESS = ["engine", "solver", "actions", "analysis", "game"]
+UI_PACKAGES = {"arcade", "pyglet", "gymnasium"}
+
+
+def random_line(game, rng, stop, max_moves=1000):
+    """
+    Make random useful moves on game, dealing only when there is nothing else to do,
+    until stop(game), True, or until no move is left, False
+    """
+    while not stop(game):
+        moves = [move for move in game.legal_moves() if move != engine.DEAL and solver.is_useful(game, move)]
+        if not moves and game.piles[engine.STOCK] and game.is_legal(engine.DEAL):
+            moves = [engine.DEAL]
+        if not moves or game.game_over or game.no_of_moves_made >= max_moves:
+            return False
+        game.apply(rng.choice(moves))
+    return True
+
+
+def empty_piles(game):
+    return sum(not game.piles[pile_no] for pile_no in engine.TABLEAU)
+
+
+def build_corpus(size=40, seed=0):
+    """ {phase: list of size snapshots}, the same for the same size and seed """
+    rng = random.Random(seed)
+    corpus = {phase: [] for phase in PHASES}
+    deal = 0
+    while len(corpus["late"]) < size:
+        game = engine.SpiderEngine(engine.shuffled_deck(deal, suits=2))
+        deal += 1
+        if len(corpus["early"]) < size:
+            corpus["early"].append(game.snapshot())
+        moves = rng.randrange(20, 60)
+        if not random_line(game, rng, lambda game: game.no_of_moves_made >= moves) or not game.piles[engine.STOCK]:
+            continue
+        if len(corpus["mid"]) < size:
+            corpus["mid"].append(game.snapshot())
+        if random_line(game, rng, lambda game: not game.piles[engine.STOCK]):
+            corpus["late"].append(game.snapshot())
+    deal = 0
+    while len(corpus["empty"]) < size:
+        game = engine.SpiderEngine(engine.shuffled_deck(deal, suits=1))
+        deal += 1
+        # A node budget, not a time limit, keeps the corpus the same on every machine
+        result = solver.solve(game, max_nodes=20_000, time_limit=3600)
+        found = []
+        for move in result.line or []:
+            game.apply(move)
+            if empty_piles(game) >= 2 and not game.game_over:
+                found.append(game.snapshot())
+        # A few positions from each deal, spread over its line
+        corpus["empty"].extend(found[::max(len(found) // 3, 1)][:min(3, size - len(corpus["empty"]))])
+    return corpus
+
+
+def first_move(game):
+    """ A legal move that isn't a deal, or None """
+    for move in game.legal_moves():
+        if move != engine.DEAL:
+            return move
+    return None
+
+
+# Case name: (phases, setup, operation, operations per call). setup(game) returns the
+# argument operation(game, argument) gets, or None to leave the position out.
+CASES = {
+    "legal_moves": (PHASES, lambda game: True, lambda game, x: game.legal_moves(), 1),
+    "run_start": (PHASES, lambda game: True,
+                  lambda game, x: [game.run_start(pile_no) for pile_no in engine.TABLEAU], len(engine.TABLEAU)),
+    "stack_completed": (PHASES, lambda game: True,
+                        lambda game, x: [game.stack_completed(pile_no) for pile_no in engine.TABLEAU],
+                        len(engine.TABLEAU)),
+    "deal_undo": (["early", "mid"], lambda game: True if game.piles[engine.STOCK] else None,
+                  lambda game, x: (game.push(engine.DEAL), game.pop()), 1),
+    "move_undo": (PHASES, first_move, lambda game, move: (game.push(move), game.pop()), 1),
+    "copy": (PHASES, lambda game: True, lambda game, x: game.copy(), 1),
+    "snapshot": (PHASES, lambda game: True, lambda game, x: game.snapshot(), 1),
+    "restore": (PHASES, lambda game: game.snapshot(), lambda game, snapshot: game.restore(snapshot), 1),
+}
+
+
+def time_calls(run, operations, repeat):
+    """ Best ns per operation of repeat samples of run(loops), and its peak memory in KiB """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        run(loops)
+        elapsed = time.perf_counter() - start
+        if elapsed >= SAMPLE_TIME:
+            break
+        loops = loops * 2 if elapsed <= 0 else max(loops * 2, int(loops * SAMPLE_TIME / elapsed * 1.2))
+    best = elapsed
+    for x in range(repeat - 1):
+        start = time.perf_counter()
+        run(loops)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    run(1)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best / (loops * operations) * 1e9, peak / 1024
+
+
+def run_case(name, corpus, repeat):
+    """ {phase: {"ns_per_op", "peak_kib"}} of one case """
+    phases, setup, operation, per_call = CASES[name]
+    results = {}
+    for phase in phases:
+        calls = []
+        for snapshot in corpus[phase]:
+            game = engine.SpiderEngine.from_snapshot(snapshot)
+            argument = setup(game)
+            if argument is not None:
+                calls.append((game, argument))
+
+        def run(loops):
+            for x in range(loops):
+                for game, argument in calls:
+                    operation(game, argument)
+        ns, peak = time_calls(run, len(calls) * per_call, repeat)
+        results[phase] = {"ns_per_op": round(ns, 1), "peak_kib": round(peak, 1)}
+    return results
+
+
+def run_games(seeds, max_moves=1000):
+    """ Games/sec, ns per move and peak memory of random games played to the end """
+    start = time.perf_counter()
+    moves = sum(len(rollout.play_game(seed, max_moves=max_moves).moves) // 3 for seed in seeds)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    rollout.play_game(seeds[0], max_moves=max_moves)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"games_per_sec": round(len(seeds) / elapsed, 2), "ns_per_move": round(elapsed / moves * 1e9, 1),
+            "peak_kib": round(peak / 1024, 1)}
+
+
+def time_import(module, repeat):
+    """ Best import time of a module in a fresh interpreter in ms, and the UI_PACKAGES it loaded """
+    best = None
+    for x in range(repeat):
+        output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True, check=True, cwd=HERE).stderr
+        # Lines of "import time: self [us] | cumulative | module", the module asked for last
+        rows = [line.split("|") for line in output.splitlines() if line.startswith("import time:")]
+        rows = [(int(cumulative), name.strip()) for self_time, cumulative, name in rows if cumulative.strip().isdigit()]
+        ms = rows[-1][0] / 1000
+        best = ms if best is None else min(best, ms)
+    return {"ms": round(best, 1), "loads": sorted({name.split(".")[0] for us, name in rows} & UI_PACKAGES)}
+
+
+def git_commit():
+    """ Short hash of the checked out commit, or None outside a git work tree """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=HERE).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine():
+    """ What results can only be compared on """
+    return {"python": platform.python_version(), "system": platform.system(), "processor": platform.machine(),
+            "cpus": os.cpu_count()}
+
+
+def load_history(path):
+    """ Every run recorded in a history file, oldest first """
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def flatten(results):
+    """ {"case/phase": ns} of the timings of a run, games as ns per move """
+    timings = {}
+    for name, phases in results["cases"].items():
+        for phase, result in phases.items():
+            timings[f"{name}/{phase}"] = result["ns_per_op"]
+    timings["random_game"] = results["games"]["ns_per_move"]
+    for module, result in results.get("imports", {}).items():
+        timings[f"import/{module}"] = result["ms"] * 1e6
+    return timings
+
+
+def report(run, previous=None):
+    """ Print a run, with the change against previous if given """
+    now = flatten(run)
+    before = flatten(previous) if previous else {}
+    print(f"{'case':>24} {'ns/op':>10} {'peak KiB':>9} {'change':>8}")
+    for name, ns in now.items():
+        case, x, phase = name.partition("/")
+        change = ""
+        if before.get(name):
+            ratio = ns / before[name]
+            change = f"{ratio - 1:+.1%}" + (" SLOWER" if ratio > REGRESSION else "")
+        if case == "import":
+            print(f"{name:>24} {ns / 1e6:>7.1f} ms {'':>9} {change:>8}")
+        else:
+            peak = run["games"]["peak_kib"] if case == "random_game" else run["cases"][case][phase]["peak_kib"]
+            print(f"{name:>24} {ns:>10.1f} {peak:>9.1f} {change:>8}")
+    print(f"{'games/sec':>24} {run['games']['games_per_sec']:>10.2f}")
+    for module in HEADLESS:
+        loads = run["imports"][module]["loads"]
+        if loads:
+            print(f"{module} imports {', '.join(loads)}, which it must not")
+
+
+def run_suite(quick=False):
+    """ Results of every case and of random games, as stored in the history """
+    size, repeat, games = (10, 3, 10) if quick else (40, 7, 40)
+    start = time.perf_counter()
+    corpus = build_corpus(size)
+    print(f"corpus of {size} positions per phase built in {time.perf_counter() - start:.1f} s")
+    return {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "machine": machine(),
+        "quick": quick,
+        "cases": {name: run_case(name, corpus, repeat) for name in CASES},
+        "games": run_games(list(range(games))),
+        "imports": {module: time_import(module, repeat) for module in IMPORTS},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="smaller corpus and fewer samples")
+    parser.add_argument("--history", default=HISTORY, help="JSON lines file of earlier runs")
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to the history")
+    args = parser.parse_args()
+    run = run_suite(args.quick)
+    # Only runs of the same kind on the same machine compare
+    earlier = [old for old in load_history(args.history)
+               if old["machine"] == run["machine"] and old["quick"] == run["quick"]]
+    report(run, earlier[-1] if earlier else None)
+    if not args.no_save:
+        with open(args.history, "a") as file:
+            file.write(json.dumps(run) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Canonical forms of Spider positions, so that positions differing only by a symmetry
+are seen as the same one
+
+Two symmetries leave a game unchanged:
+
+    suits    renaming suits everywhere changes nothing, so suits are renamed in
+             the order they first show up, reading the play piles bottom card
+             first and then the stock
+    columns  once the stock is empty the play piles can be put in any order, so
+             they are sorted. While it has cards the order matters: a deal gives
+             one card to each pile in turn.
+
+The foundation is left out, it holds whatever completed suits the rest lacks.
+Play piles with the same values and face down counts but different suits keep
+their order when sorted, so a few equivalent positions still get different forms.
+Positions that are not equivalent never share one.
+"""
+import hashlib
+import itertools
+import random
+import time
+
+import engine
+import settings
+import solver
+
+SUITS = len(settings.CARD_SUITS)
+# bytes.translate tables taking a card code to its suit and to its value
+SUIT_TABLE = bytes(engine.SUIT[code] if code < engine.CARD_CODES else 0 for code in range(256))
+VALUE_TABLE = bytes(engine.VALUE[code] if code < engine.CARD_CODES else 0 for code in range(256))
+SUIT_BYTES = [bytes([suit]) for suit in range(SUITS)]
+COUNT_BYTES = [bytes([count]) for count in range(engine.DECK_SIZE + 1)]
+
+
+def rename_table(order):
+    """ bytes.translate table renaming suit order[n] to suit n """
+    table = bytearray(range(256))
+    for new_suit, suit in enumerate(order):
+        for value in range(engine.SUIT_LENGTH):
+            table[suit * engine.SUIT_LENGTH + value] = new_suit * engine.SUIT_LENGTH + value
+    return bytes(table)
+
+
+# Table of every order the suits can first show up in
+RENAMES = {order: rename_table(order) for order in itertools.permutations(range(SUITS))}
+
+
+def canonical_form(piles, face_down):
+    """ bytes shared by exactly the positions equivalent to this one (see above) """
+    stock = piles[engine.STOCK]
+    order = engine.TABLEAU
+    if not stock:
+        # Sort on what renaming suits can't change first: face down count, then values
+        sort_keys = [COUNT_BYTES[face_down[pile_no]] + piles[pile_no].translate(VALUE_TABLE) for pile_no in order]
+        order = sorted(order, key=sort_keys.__getitem__)
+    columns = [piles[pile_no] for pile_no in order]
+    cards = b"".join(columns) + stock
+    suits = cards.translate(SUIT_TABLE)
+    # Suits not on the table go last, in any order: they are all in the foundation
+    firsts = [suits.find(suit) % (engine.DECK_SIZE + 1) for suit in SUIT_BYTES]
+    rename = RENAMES[tuple(sorted(range(SUITS), key=firsts.__getitem__))]
+    counts = [face_down[pile_no] for pile_no in order]
+    if stock or len(set(sort_keys)) == len(sort_keys):
+        cards = cards.translate(rename)
+    else:
+        # Piles that tied only differ in suits: sort them again once renamed
+        columns = sorted(zip(counts, [pile.translate(rename) for pile in columns]))
+        counts = [count for count, pile in columns]
+        columns = [pile for count, pile in columns]
+        cards = b"".join(columns)
+    return cards + bytes(map(len, columns)) + bytes(counts) + bytes([len(stock)])
+
+
+def hash_form(form):
+    """ 64-bit hash of a canonical form """
+    return int.from_bytes(hashlib.blake2b(form, digest_size=8).digest(), "little")
+
+
+def canonical_key(game):
+    """ 64-bit key shared by the positions equivalent to game's, for transposition tables """
+    return hash_form(canonical_form(game.piles, game.face_down))
+
+
+def search_key(game):
+    """
+    Zobrist key while the stock has cards, canonical_key() once it is empty. Within
+    one deal suits never trade places, so only sorting the play piles finds
+    positions a search has seen, and that is only allowed without a stock.
+    """
+    if game.piles[engine.STOCK]:
+        return game.key
+    return canonical_key(game)
+
+
+def state_key(state):
+    """ canonical_key() of a position stored as SpiderEngine.encode() bytes """
+    state = bytes(state)
+    return hash_form(canonical_form(engine.split_piles(state),
+                                    state[engine.DECK_SIZE + settings.PILE_COUNT:engine.STATE_SIZE]))
+
+
+def benchmark(seeds=range(20), suits=2, max_nodes=50_000, positions=200, repeat=50):
+    """
+    Print the nodes the solver needs on a few deals when positions are told apart
+    by Zobrist key and by search_key(), then time canonical_key()
+    """
+    print(f"{'seed':>5} {'status':>8} {'zobrist':>8} {'search_key':>10} {'saved':>6}")
+    totals = [0, 0]
+    for seed in seeds:
+        game = engine.SpiderEngine(engine.shuffled_deck(seed, suits))
+        plain = solver.Solver(max_nodes, time_limit=60.0).solve(game)
+        merged = solver.Solver(max_nodes, time_limit=60.0, key=search_key).solve(game)
+        totals[0] += plain.nodes
+        totals[1] += merged.nodes
+        print(f"{seed:>5} {merged.status:>8} {plain.nodes:>8} {merged.nodes:>10} {1 - merged.nodes / plain.nodes:>6.1%}")
+    print(f"{'all':>5} {'':>8} {totals[0]:>8} {totals[1]:>10} {1 - totals[1] / totals[0]:>6.1%}")
+    rng = random.Random(0)
+    games = []
+    for game_no in range(positions):
+        game = engine.SpiderEngine(engine.shuffled_deck(game_no, suits))
+        for x in range(rng.randrange(20, 200)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+            game.apply(rng.choice(moves))
+        games.append(game)
+    start = time.perf_counter()
+    for x in range(repeat):
+        for game in games:
+            canonical_key(game)
+    elapsed = time.perf_counter() - start
+    print(f"{'canonical_key':>14} {elapsed / (repeat * positions) * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,6 +1,28 @@
 import arcade
 import settings
 
+# Textures shared by every card, filled in once by load_textures()
+FACE_TEXTURES = {}
+BACK_TEXTURE = None
+
+
+def load_textures(atlas=None):
+    """
+    Load the back and the 52 card faces once. If a texture atlas is given, the
+    textures are also put in it so the first flip of a card doesn't upload anything.
+    """
+    global BACK_TEXTURE
+    if BACK_TEXTURE is None:
+        BACK_TEXTURE = arcade.load_texture(settings.FACE_DOWN_IMAGE, hit_box_algorithm="None")
+        for suit in settings.CARD_SUITS:
+            for value in settings.CARD_VALUES:
+                FACE_TEXTURES[suit, value] = arcade.load_texture(
+                    f":resources:images/cards/card{suit}{value}.png", hit_box_algorithm="None")
+    if atlas is not None:
+        for texture in [BACK_TEXTURE, *FACE_TEXTURES.values()]:
+            atlas.add(texture)
+
+
 class Card(arcade.Sprite):
     """ Card sprite """
 
@@ -11,23 +33,22 @@ class Card(arcade.Sprite):
         self.suit = suit
         self.value = value
         self.value_index = settings.CARD_VALUES.index(self.value)
-        self.history={}
-        # Image to use for the sprite when face up
-        self.image_file_name = f":resources:images/cards/card{self.suit}{self.value}.png"
+        # Compact code used by the rules engine
+        self.code = settings.CARD_SUITS.index(self.suit) * len(settings.CARD_VALUES) + self.value_index
+        load_textures()
+        # Texture to use for the sprite when face up
+        self.face_texture = FACE_TEXTURES[suit, value]
         self.is_face_up = False
-        super().__init__(settings.FACE_DOWN_IMAGE, scale, hit_box_algorithm="None")
-
-    def add_to_history(self, move_no, pile_index=None, position=None, flipped=False):
-        self.history[move_no] = [position, pile_index, flipped]
+        super().__init__(scale=scale, hit_box_algorithm="None", texture=BACK_TEXTURE)
 
     def face_down(self):
         """ Turn card face-down """
-        self.texture = arcade.load_texture(settings.FACE_DOWN_IMAGE)
+        self.texture = BACK_TEXTURE
         self.is_face_up = False
 
     def face_up(self):
         """ Turn card face-up """
-        self.texture = arcade.load_texture(self.image_file_name)
+        self.texture = self.face_texture
         self.is_face_up = True
 
     @property
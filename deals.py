@@ -0,0 +1,114 @@
+"""
+Seeded deals in bulk and a memory-mapped corpus of deals
+
+A deal is the 104-byte deck SpiderEngine deals from (the card dealt first is the
+last one), so it fixes the tableau and the stock. deal_batch() shuffles a whole
+array of seeds at once and gives the same decks as engine.shuffled_deck().
+
+A corpus file is a 32-byte header (magic, version, suits, number of deals), the
+seeds as sorted uint64 and then one 104-byte deck per seed, in the same order.
+"""
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+import engine
+import settings
+
+MAGIC = b"SPDEALS\0"
+VERSION = 1
+# magic, version, suits, number of deals
+HEADER = struct.Struct("<8sIIQ8x")
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def deal_batch(seeds, suits=len(settings.CARD_SUITS)):
+    """ Decks of many deals at once, an array of shape (len(seeds), 104) """
+    seeds = np.asarray(seeds, dtype=np.uint64)
+    decks = np.tile(np.frombuffer(engine.new_deck(suits), dtype=np.uint8), (len(seeds), 1))
+    rows = np.arange(len(seeds))
+    state = seeds.copy()
+    for i in range(engine.DECK_SIZE - 1, 0, -1):
+        # SplitMix64, as in engine.shuffled_deck
+        state += _GOLDEN
+        z = state
+        z = (z ^ (z >> np.uint64(30))) * _MIX_1
+        z = (z ^ (z >> np.uint64(27))) * _MIX_2
+        z ^= z >> np.uint64(31)
+        j = ((z >> np.uint64(32)) * np.uint64(i + 1)) >> np.uint64(32)
+        swapped = decks[rows, j]
+        decks[rows, j] = decks[:, i]
+        decks[:, i] = swapped
+    return decks
+
+
+def write_corpus(path, seeds, suits=len(settings.CARD_SUITS), chunk_size=1 << 16):
+    """ Deal every seed and write the decks to a corpus file, chunk_size deals at a time """
+    seeds = np.unique(np.asarray(seeds, dtype=np.uint64))
+    count = len(seeds)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, suits, count))
+        file.write(seeds.tobytes())
+        file.truncate(HEADER.size + count * (8 + engine.DECK_SIZE))
+    decks = np.memmap(path, dtype=np.uint8, mode="r+", offset=HEADER.size + count * 8,
+                      shape=(count, engine.DECK_SIZE))
+    for start in range(0, count, chunk_size):
+        decks[start:start + chunk_size] = deal_batch(seeds[start:start + chunk_size], suits)
+    decks.flush()
+    del decks
+
+
+class DealCorpus:
+    """ Read-only, memory-mapped view of a corpus file """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            magic, version, self.suits, count = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} deal corpus")
+        self.seeds = np.memmap(path, dtype=np.uint64, mode="r", offset=HEADER.size, shape=(count,))
+        self.decks = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size + count * 8,
+                               shape=(count, engine.DECK_SIZE))
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def index(self, seed):
+        """ Row of a seed in the corpus """
+        row = int(np.searchsorted(self.seeds, np.uint64(seed)))
+        if row == len(self.seeds) or self.seeds[row] != seed:
+            raise KeyError(seed)
+        return row
+
+    def deck(self, seed):
+        """ Deck of the deal numbered seed """
+        return self.decks[self.index(seed)]
+
+    def game(self, seed):
+        """ A new SpiderEngine for the deal numbered seed """
+        return engine.SpiderEngine(self.deck(seed).tobytes())
+
+
+def benchmark(count=1_000_000, path=None):
+    """ Time dealing one at a time against deal_batch and writing a corpus, to a temporary file by default """
+    start = time.perf_counter()
+    for seed in range(10_000):
+        engine.shuffled_deck(seed)
+    print(f"{'shuffled_deck':>14} {10_000 / (time.perf_counter() - start):12.0f} deals/sec")
+    start = time.perf_counter()
+    deal_batch(np.arange(count))
+    print(f"{'deal_batch':>14} {count / (time.perf_counter() - start):12.0f} deals/sec")
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_corpus(path or os.path.join(directory, "deals.bin"), range(count))
+        print(f"{'write_corpus':>14} {count / (time.perf_counter() - start):12.0f} deals/sec")
+
+
+if __name__ == "__main__":
+    benchmark()
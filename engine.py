@@ -0,0 +1,537 @@
+"""
+Headless Spider rules engine
+
+Cards are small integers: code = suit * 13 + value_index, so both decks fit in
+the values 0..51. Every pile is a bytearray of codes, bottom card first, and
+the cards below face_down[pile] are still face down. key is the Zobrist hash of
+the position, kept up to date by every change to the piles.
+
+Move generation works from per-pile caches (start of the movable run, value a
+card needs to go on the pile) and bitmasks of which piles take which value.
+Only the piles a move or deal touches are refreshed, and each refresh bumps the
+pile's version so that observers can tell which piles changed.
+
+push() makes a move and records it in a command log, pop() takes the last one
+back and redo() makes it again. Each record is a single int holding the move
+and its Outcome, which is all that is needed to reverse it.
+
+snapshot() packs the whole game but the log into SNAPSHOT_SIZE immutable bytes
+and restore() goes back to it, so positions can be kept or sent to another
+process without copying engines.
+"""
+import random
+import struct
+import time
+from array import array
+from collections import deque, namedtuple
+
+import settings
+import zobrist
+
+# Cards in one complete suit (K down to A)
+SUIT_LENGTH = len(settings.CARD_VALUES)
+# Number of distinct card codes and number of cards in the game (two decks)
+CARD_CODES = len(settings.CARD_SUITS) * SUIT_LENGTH
+DECK_SIZE = 2 * CARD_CODES
+
+STOCK = settings.BOTTOM_FACE_DOWN_PILE
+FOUNDATION = settings.FOUNDATION_PILE
+TABLEAU = range(settings.PLAY_PILE_1, settings.PLAY_PILE_10 + 1)
+# Cards the starting deal gives each play pile: 54 in all, leaving 50 in the stock for five deals of 10
+DEAL_COUNTS = [6 if pile_no < 4 else 5 for pile_no in TABLEAU]
+
+# A move is (source pile, index of the first card moved, target pile).
+# Dealing a row from the stock is the move out of the bottom face down pile.
+DEAL = (STOCK, 0, STOCK)
+
+MASK64 = (1 << 64) - 1
+
+# Lookup tables indexed by card code
+VALUE = [code % SUIT_LENGTH for code in range(CARD_CODES)]
+SUIT = [code // SUIT_LENGTH for code in range(CARD_CODES)]
+# The card that may sit directly below a card in a same-suit run, or -1 for a King
+NEXT_UP = [code + 1 if code % SUIT_LENGTH != SUIT_LENGTH - 1 else -1 for code in range(CARD_CODES)]
+
+# What apply() did besides moving the cards: how many cards were moved or dealt,
+# whether the source pile's new top card was flipped, whether a completed suit
+# was removed from the target pile and whether that flipped the card below it.
+Outcome = namedtuple("Outcome", ["count", "flipped", "completed", "uncovered"])
+
+# Bytes in an encoded position: every card, then the length and face down count of every pile
+STATE_SIZE = DECK_SIZE + 2 * settings.PILE_COUNT
+# A snapshot is an encoded position followed by the score, the number of moves made and the Zobrist key
+SNAPSHOT_TAIL = struct.Struct("<iIQ")
+SNAPSHOT_SIZE = STATE_SIZE + SNAPSHOT_TAIL.size
+
+
+def pack_record(move, outcome):
+    """ Command log record of a move and its Outcome """
+    source, index, target = move
+    count, flipped, completed, uncovered = outcome
+    return (source | index << 4 | target << 11 | count << 15
+            | flipped << 22 | completed << 23 | uncovered << 24)
+
+
+def unpack_record(record):
+    """ (move, Outcome) of a command log record """
+    move = (record & 0xF, record >> 4 & 0x7F, record >> 11 & 0xF)
+    outcome = Outcome(record >> 15 & 0x7F, bool(record >> 22 & 1),
+                      bool(record >> 23 & 1), bool(record >> 24 & 1))
+    return move, outcome
+
+
+def split_piles(data):
+    """ The piles of an encoded position, as bytearrays """
+    piles = []
+    start = 0
+    for length in data[DECK_SIZE:DECK_SIZE + settings.PILE_COUNT]:
+        piles.append(bytearray(data[start:start + length]))
+        start += length
+    return piles
+
+
+def load_log(path):
+    """ Records written by SpiderEngine.save_log """
+    records = array("I")
+    with open(path, "rb") as file:
+        records.frombytes(file.read())
+    return list(records)
+
+
+def new_deck(suits=len(settings.CARD_SUITS)):
+    """
+    The 104 cards in the order GameView creates the card sprites, using only the
+    first suits suits of settings.CARD_SUITS
+    """
+    deck = bytearray()
+    for x in range(DECK_SIZE // (suits * SUIT_LENGTH)):
+        deck.extend(range(suits * SUIT_LENGTH))
+    return deck
+
+
+def shuffled_deck(seed=None, suits=len(settings.CARD_SUITS)):
+    """
+    The deck of the deal numbered seed, shuffled with a Fisher-Yates shuffle driven
+    by SplitMix64. deals.deal_batch() deals the same games many at a time.
+    A seed of None picks a random deal.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    deck = new_deck(suits)
+    state = seed & MASK64
+    for i in range(DECK_SIZE - 1, 0, -1):
+        # Next number of a SplitMix64 generator
+        state = (state + 0x9E3779B97F4A7C15) & MASK64
+        z = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        # Scale the top 32 bits of the random number to 0..i
+        j = (((z ^ (z >> 31)) >> 32) * (i + 1)) >> 32
+        deck[i], deck[j] = deck[j], deck[i]
+    return deck
+
+
+class SpiderEngine:
+    """ State and rules of one game of Spider, without any rendering """
+
+    def __init__(self, deck=None):
+        """
+        Deal a new game. deck holds the 104 card codes of the bottom face down pile,
+        the card dealt first is the last one. Defaults to the unshuffled deck.
+        """
+        self.piles = [bytearray() for x in range(settings.PILE_COUNT)]
+        # Number of face down cards at the bottom of each pile
+        self.face_down = [0] * settings.PILE_COUNT
+        self.score = settings.START_SCORE
+        self.no_of_moves_made = 0
+
+        stock = bytearray(new_deck() if deck is None else deck)
+        for pile_no in TABLEAU:
+            # Deal 6 cards to the first 4 piles and 5 to the rest, one pop at a time
+            count = DEAL_COUNTS[pile_no]
+            self.piles[pile_no] = stock[:-count - 1:-1]
+            del stock[-count:]
+            # Only the top card starts face up
+            self.face_down[pile_no] = count - 1
+        self.piles[STOCK] = stock
+        self.face_down[STOCK] = len(stock)
+        self.key = zobrist.position_key(self.piles, self.face_down)
+        self.index_piles()
+        self.clear_log()
+
+    @classmethod
+    def from_piles(cls, piles, face_down, score=settings.START_SCORE, no_of_moves_made=0):
+        """ Build an engine from explicit piles of card codes and face down counts """
+        engine = cls.__new__(cls)
+        engine.piles = [bytearray(pile) for pile in piles]
+        engine.face_down = [int(count) for count in face_down]
+        engine.score = score
+        engine.no_of_moves_made = no_of_moves_made
+        engine.key = zobrist.position_key(engine.piles, engine.face_down)
+        engine.index_piles()
+        engine.clear_log()
+        return engine
+
+    @classmethod
+    def decode(cls, data, score=settings.START_SCORE, no_of_moves_made=0):
+        """ Build an engine from a position made by encode() """
+        data = bytes(data)
+        return cls.from_piles(split_piles(data), data[DECK_SIZE + settings.PILE_COUNT:], score, no_of_moves_made)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """ Build an engine from a snapshot() """
+        engine = cls.__new__(cls)
+        engine.versions = [0] * settings.PILE_COUNT
+        engine.restore(snapshot)
+        return engine
+
+    def encode(self):
+        """
+        The position in STATE_SIZE bytes: the cards of every pile in pile order,
+        then the pile lengths and then the face down counts
+        """
+        return b"".join(self.piles) + bytes(map(len, self.piles)) + bytes(self.face_down)
+
+    def snapshot(self):
+        """
+        The whole game except the command log as SNAPSHOT_SIZE immutable bytes,
+        cheap to keep or to send to another process
+        """
+        return self.encode() + SNAPSHOT_TAIL.pack(self.score, self.no_of_moves_made, self.key)
+
+    def restore(self, snapshot):
+        """ Go back to the game a snapshot() was taken of, with an empty command log """
+        self.piles = split_piles(snapshot)
+        self.face_down = list(snapshot[DECK_SIZE + settings.PILE_COUNT:STATE_SIZE])
+        self.score, self.no_of_moves_made, self.key = SNAPSHOT_TAIL.unpack_from(snapshot, STATE_SIZE)
+        versions = self.versions
+        self.index_piles()
+        # Keep counting up, so that every pile looks changed to observers
+        self.versions = [old + new for old, new in zip(versions, self.versions)]
+        self.clear_log()
+
+    def copy(self):
+        """ Independent copy of this game, with an empty command log """
+        engine = SpiderEngine.__new__(SpiderEngine)
+        engine.piles = [bytearray(pile) for pile in self.piles]
+        engine.face_down = self.face_down[:]
+        engine.score = self.score
+        engine.no_of_moves_made = self.no_of_moves_made
+        engine.key = self.key
+        engine.run_starts = self.run_starts[:]
+        engine.wanted = self.wanted[:]
+        engine.accepts = self.accepts[:]
+        engine.empty = self.empty
+        engine.versions = self.versions[:]
+        engine.clear_log()
+        return engine
+
+    def clear_log(self, limit=settings.UNDO_LIMIT):
+        """ Forget every move made so far and every move taken back """
+        # Records of the moves made, oldest first. The oldest are dropped past limit
+        self.log = deque(maxlen=limit)
+        # Records of the moves taken back, the last one taken back at the end
+        self.redo_log = []
+
+    def index_piles(self):
+        """ Build the move generation caches from scratch """
+        # Start of the movable run of every play pile
+        self.run_starts = [0] * settings.PILE_COUNT
+        # Value a card needs to go on each play pile, -1 if none can
+        self.wanted = [-1] * settings.PILE_COUNT
+        # Bitmask of the play piles that take a card of each value, and of the empty play piles
+        self.accepts = [0] * SUIT_LENGTH
+        self.empty = 0
+        # Number of times each play pile has changed
+        self.versions = [0] * settings.PILE_COUNT
+        for pile_no in TABLEAU:
+            self.refresh(pile_no)
+
+    def refresh(self, pile_no):
+        """ Update the move generation caches of a play pile after it changed """
+        self.versions[pile_no] += 1
+        bit = 1 << pile_no
+        wanted = self.wanted[pile_no]
+        if wanted >= 0:
+            self.accepts[wanted] &= ~bit
+        pile = self.piles[pile_no]
+        if pile:
+            self.empty &= ~bit
+            wanted = VALUE[pile[-1]] - 1
+            if wanted >= 0:
+                self.accepts[wanted] |= bit
+            # Walk down the same-suit run on top of the face down cards
+            index = len(pile) - 1
+            floor = self.face_down[pile_no]
+            while index > floor and pile[index - 1] == NEXT_UP[pile[index]]:
+                index -= 1
+            self.run_starts[pile_no] = index
+        else:
+            self.empty |= bit
+            wanted = -1
+            self.run_starts[pile_no] = 0
+        self.wanted[pile_no] = wanted
+
+    @property
+    def game_over(self):
+        """ Have all the suits been completed? """
+        return len(self.piles[FOUNDATION]) == DECK_SIZE
+
+    def top(self, pile_no):
+        """ Code of the top card of a pile, or -1 if the pile is empty """
+        pile = self.piles[pile_no]
+        return pile[-1] if pile else -1
+
+    def run_start(self, pile_no):
+        """
+        Index of the first card of the movable run at the top of a pile: face up cards
+        of one suit in descending order. Equals the pile length for an empty pile.
+        """
+        return self.run_starts[pile_no]
+
+    def stack_completed(self, pile_no):
+        """ Does the pile end in a face up run from King down to Ace of one suit? """
+        pile = self.piles[pile_no]
+        return (len(pile) >= SUIT_LENGTH and VALUE[pile[-1]] == 0
+                and len(pile) - self.run_start(pile_no) == SUIT_LENGTH)
+
+    def legal_moves(self):
+        """ List of every legal move in the current position """
+        moves = []
+        piles = self.piles
+        accepts = self.accepts
+        empty = self.empty
+        for source in TABLEAU:
+            pile = piles[source]
+            others = ~(1 << source)
+            for index in range(self.run_starts[source], len(pile)):
+                targets = (accepts[VALUE[pile[index]]] | empty) & others
+                while targets:
+                    lowest = targets & -targets
+                    moves.append((source, index, lowest.bit_length() - 1))
+                    targets ^= lowest
+        if piles[STOCK]:
+            moves.append(DEAL)
+        return moves
+
+    def is_legal(self, move):
+        """ Can this move be made in the current position? """
+        source, index, target = move
+        if source == STOCK:
+            return move == DEAL and len(self.piles[STOCK]) > 0
+        if source not in TABLEAU or target not in TABLEAU or source == target:
+            return False
+        pile = self.piles[source]
+        if not self.run_start(source) <= index < len(pile):
+            return False
+        target_pile = self.piles[target]
+        return not target_pile or VALUE[target_pile[-1]] - VALUE[pile[index]] == 1
+
+    def flip_top(self, pile_no):
+        """ Turn the top card of a pile face up. Returns True if it was face down """
+        count = self.face_down[pile_no]
+        if count and count == len(self.piles[pile_no]):
+            self.face_down[pile_no] = count - 1
+            self.key ^= zobrist.face_down_key(pile_no, count) ^ zobrist.face_down_key(pile_no, count - 1)
+            self.score += settings.FLIP_POINTS
+            return True
+        return False
+
+    def deal(self):
+        """ Deal one card from the stock onto every non-empty play pile """
+        stock = self.piles[STOCK]
+        key = self.key ^ zobrist.face_down_key(STOCK, len(stock))
+        count = 0
+        for pile_no in TABLEAU:
+            pile = self.piles[pile_no]
+            if pile and stock:
+                code = stock.pop()
+                key ^= zobrist.card_key(STOCK, len(stock), code) ^ zobrist.card_key(pile_no, len(pile), code)
+                pile.append(code)
+                self.refresh(pile_no)
+                count += 1
+        self.face_down[STOCK] = len(stock)
+        self.key = key ^ zobrist.face_down_key(STOCK, len(stock))
+        self.no_of_moves_made += 1
+        return Outcome(count, False, False, False)
+
+    def apply(self, move):
+        """ Make a legal move and return its Outcome """
+        source, index, target = move
+        if source == STOCK:
+            return self.deal()
+        pile = self.piles[source]
+        target_pile = self.piles[target]
+        count = len(pile) - index
+        run = pile[index:]
+        self.key ^= zobrist.run_key(source, index, run) ^ zobrist.run_key(target, len(target_pile), run)
+        target_pile += run
+        del pile[index:]
+        flipped = self.flip_top(source)
+        self.refresh(source)
+        self.refresh(target)
+
+        # Check if the move resulted in forming a stack
+        completed = self.stack_completed(target)
+        uncovered = False
+        if completed:
+            foundation = self.piles[FOUNDATION]
+            # The Ace goes into the foundation first
+            stack = target_pile[:-SUIT_LENGTH - 1:-1]
+            self.key ^= (zobrist.run_key(target, len(target_pile) - SUIT_LENGTH, stack[::-1])
+                         ^ zobrist.run_key(FOUNDATION, len(foundation), stack))
+            foundation += stack
+            del target_pile[-SUIT_LENGTH:]
+            self.score += settings.STACK_POINTS
+            uncovered = self.flip_top(target)
+            self.refresh(target)
+        self.no_of_moves_made += 1
+        return Outcome(count, flipped, completed, uncovered)
+
+    def flip_down(self, pile_no):
+        """ Turn the top card of a pile face down again, the reverse of flip_top """
+        count = self.face_down[pile_no]
+        self.face_down[pile_no] = count + 1
+        self.key ^= zobrist.face_down_key(pile_no, count) ^ zobrist.face_down_key(pile_no, count + 1)
+        self.score -= settings.FLIP_POINTS
+
+    def undeal(self, count):
+        """ Put the cards of the last deal back on the stock """
+        stock = self.piles[STOCK]
+        key = self.key ^ zobrist.face_down_key(STOCK, len(stock))
+        # Deals never empty a pile, so the cards went to the first count piles that have cards
+        receivers = [pile_no for pile_no in TABLEAU if self.piles[pile_no]][:count]
+        for pile_no in reversed(receivers):
+            pile = self.piles[pile_no]
+            code = pile.pop()
+            key ^= zobrist.card_key(pile_no, len(pile), code) ^ zobrist.card_key(STOCK, len(stock), code)
+            stock.append(code)
+            self.refresh(pile_no)
+        self.face_down[STOCK] = len(stock)
+        self.key = key ^ zobrist.face_down_key(STOCK, len(stock))
+        self.no_of_moves_made -= 1
+
+    def unapply(self, move, outcome):
+        """ Take back a move that apply() returned this Outcome for """
+        source, index, target = move
+        if source == STOCK:
+            self.undeal(outcome.count)
+            return
+        pile = self.piles[source]
+        target_pile = self.piles[target]
+        if outcome.completed:
+            if outcome.uncovered:
+                self.flip_down(target)
+            foundation = self.piles[FOUNDATION]
+            stack = foundation[-SUIT_LENGTH:]
+            run = stack[::-1]
+            self.key ^= (zobrist.run_key(FOUNDATION, len(foundation) - SUIT_LENGTH, stack)
+                         ^ zobrist.run_key(target, len(target_pile), run))
+            target_pile += run
+            del foundation[-SUIT_LENGTH:]
+            self.score -= settings.STACK_POINTS
+        if outcome.flipped:
+            self.flip_down(source)
+        run = target_pile[-outcome.count:]
+        self.key ^= (zobrist.run_key(target, len(target_pile) - outcome.count, run)
+                     ^ zobrist.run_key(source, index, run))
+        pile += run
+        del target_pile[-outcome.count:]
+        self.refresh(source)
+        self.refresh(target)
+        self.no_of_moves_made -= 1
+
+    def push(self, move):
+        """ apply() a move and record it in the command log """
+        outcome = self.apply(move)
+        self.log.append(pack_record(move, outcome))
+        self.redo_log.clear()
+        return outcome
+
+    def pop(self):
+        """ Take back the last move in the command log. Returns its (move, Outcome) """
+        record = self.log.pop()
+        move, outcome = unpack_record(record)
+        self.unapply(move, outcome)
+        self.redo_log.append(record)
+        return move, outcome
+
+    def redo(self):
+        """ Make the last move taken back by pop() again. Returns its (move, Outcome) """
+        record = self.redo_log.pop()
+        move = unpack_record(record)[0]
+        outcome = self.apply(move)
+        self.log.append(record)
+        return move, outcome
+
+    def save_log(self, path):
+        """ Write the command log to a file, 4 bytes per move """
+        with open(path, "wb") as file:
+            file.write(array("I", self.log).tobytes())
+
+    def replay(self, records):
+        """ push() the moves of command log records, e.g. from load_log """
+        for record in records:
+            self.push(unpack_record(record)[0])
+
+
+def rescan_legal_moves(game):
+    """ legal_moves() rebuilt from scratch, walking every pile like GameView.get_possible_moves did """
+    moves = []
+    piles = game.piles
+    tops = [VALUE[piles[pile_no][-1]] if piles[pile_no] else None for pile_no in TABLEAU]
+    for source in TABLEAU:
+        pile = piles[source]
+        if not pile:
+            continue
+        # Face up cards, walked down from the top while they form a run
+        face_up = pile[game.face_down[source]:]
+        start = len(face_up) - 1
+        while start > 0 and face_up[start - 1] == NEXT_UP[face_up[start]]:
+            start -= 1
+        for index in range(start, len(face_up)):
+            value = VALUE[face_up[index]]
+            for target in TABLEAU:
+                if target != source and (tops[target] is None or tops[target] - value == 1):
+                    moves.append((source, game.face_down[source] + index, target))
+    if piles[STOCK]:
+        moves.append(DEAL)
+    return moves
+
+
+def benchmark(positions=500, repeat=200, seed=0):
+    """ Time legal_moves() against a full rescan, and cloning, on random mid-game positions """
+    rng = random.Random(seed)
+    games = []
+    for game_no in range(positions):
+        game = SpiderEngine(shuffled_deck(game_no))
+        for x in range(rng.randrange(20, 80)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+            game.apply(rng.choice(moves))
+        assert game.legal_moves() == rescan_legal_moves(game)
+        games.append(game)
+    for name, generate in [("rescan", rescan_legal_moves), ("legal_moves", SpiderEngine.legal_moves)]:
+        start = time.perf_counter()
+        for x in range(repeat):
+            for game in games:
+                generate(game)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12} {elapsed / (repeat * positions) * 1e6:8.2f} us/query")
+    # Cloning: a whole engine, a snapshot, and going back to one
+    snapshots = [game.snapshot() for game in games]
+    target = games[0].copy()
+    for name, clone in [("copy", lambda game, snapshot: game.copy()),
+                        ("snapshot", lambda game, snapshot: game.snapshot()),
+                        ("restore", lambda game, snapshot: target.restore(snapshot))]:
+        start = time.perf_counter()
+        for x in range(repeat):
+            for game, snapshot in zip(games, snapshots):
+                clone(game, snapshot)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12} {elapsed / (repeat * positions) * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,178 @@
+"""
+Monte Carlo tree search for move hints
+
+Every simulation walks down the tree from the current position with UCT, makes the
+moves on one copy of the game with push() and takes them all back with pop()
+afterwards. A short random playout judges the position it reaches with the
+solver's evaluation. Tree nodes are kept in a transposition table by position
+key, so the next hint, one move later, starts from the statistics gathered so far.
+
+A hint must not know the face down cards or the order of the stock. Each
+simulation runs on its own copy with those cards shuffled among their places,
+and nodes are keyed by visible_key(), which leaves them out. A node therefore
+collects the statistics of every deal the player can't tell apart.
+"""
+import math
+import random
+import time
+from collections import namedtuple
+
+import engine
+import settings
+import solver
+import zobrist
+
+# Evaluation points worth a value of 1 in the tree statistics
+VALUE_SCALE = 100
+EXPLORATION = 1.0
+
+# A ranked move: how often the search tried it and the mean value it got
+RankedMove = namedtuple("RankedMove", ["move", "visits", "value"])
+
+
+class HintResult(namedtuple("HintResult", ["moves", "simulations", "elapsed"])):
+    """ moves is the list of RankedMoves, most visited first """
+
+    @property
+    def simulations_per_sec(self):
+        return self.simulations / self.elapsed if self.elapsed else 0.0
+
+
+def candidate_moves(game):
+    """ The moves solver.is_useful() accepts, or every legal move if it accepts none """
+    moves = game.legal_moves()
+    return [move for move in moves if solver.is_useful(game, move)] or moves
+
+
+def visible_key(game):
+    """ The position key without the cards the player can't see """
+    key = game.key
+    for pile_no, count in enumerate(game.face_down):
+        if count:
+            key ^= zobrist.run_key(pile_no, 0, game.piles[pile_no][:count])
+    return key
+
+
+def determinize(game, rng):
+    """ A copy of the game with its face down and stock cards shuffled among their places """
+    # Sorted first, so the copy doesn't depend on where the cards really lie
+    hidden = bytearray(sorted(code for pile, count in zip(game.piles, game.face_down) for code in pile[:count]))
+    rng.shuffle(hidden)
+    piles = []
+    for pile, count in zip(game.piles, game.face_down):
+        piles.append(hidden[:count] + pile[count:])
+        del hidden[:count]
+    return engine.SpiderEngine.from_piles(piles, game.face_down, game.score, game.no_of_moves_made)
+
+
+class Node:
+    """ Search statistics of one position and of each move out of it """
+
+    __slots__ = ["moves", "visits", "move_visits", "move_values"]
+
+    def __init__(self, game):
+        self.moves = candidate_moves(game)
+        self.visits = 0
+        self.move_visits = [0] * len(self.moves)
+        self.move_values = [0.0] * len(self.moves)
+
+    def select(self):
+        """ Index of the move to follow: an untried one, else the best UCT score """
+        log_visits = math.log(self.visits + 1)
+        best = -1
+        best_score = -math.inf
+        for i, visits in enumerate(self.move_visits):
+            if not visits:
+                return i
+            score = self.move_values[i] / visits + EXPLORATION * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best = i
+                best_score = score
+        return best
+
+
+class HintEngine:
+    """ Ranks the moves of a position within a time and simulation budget """
+
+    def __init__(self, playout_depth=20, capacity=200_000, seed=None):
+        self.playout_depth = playout_depth
+        self.nodes = zobrist.TranspositionTable(capacity)
+        self.rng = random.Random(seed)
+
+    def hint(self, game, time_limit=settings.HINT_TIME, max_simulations=None):
+        """ Search from a position, which is left untouched, and rank its moves """
+        start = time.perf_counter()
+        deadline = start + time_limit
+        key = visible_key(game)
+        root = self.nodes.get(key)
+        if root is None:
+            root = Node(game)
+            self.nodes.store(key, root)
+        simulations = 0
+        while root.moves and time.perf_counter() < deadline:
+            if max_simulations is not None and simulations >= max_simulations:
+                break
+            deal = determinize(game, self.rng)
+            # Every move of a simulation must stay in the log until it is taken back
+            deal.clear_log(limit=None)
+            self.simulate(deal, root)
+            simulations += 1
+        ranked = sorted((RankedMove(move, visits, value / visits if visits else 0.0)
+                         for move, visits, value in zip(root.moves, root.move_visits, root.move_values)),
+                        key=lambda ranked_move: (ranked_move.visits, ranked_move.value), reverse=True)
+        return HintResult(ranked, simulations, time.perf_counter() - start)
+
+    def simulate(self, game, root):
+        """ One selection, expansion, playout and backup, leaving game as it was """
+        start_value = solver.evaluate(game)
+        made = len(game.log)
+        path = []
+        seen = {game.key}
+        node = root
+        while node is not None and node.moves:
+            i = node.select()
+            path.append((node, i))
+            game.push(node.moves[i])
+            if game.key in seen:
+                # Went round in a circle
+                break
+            seen.add(game.key)
+            key = visible_key(game)
+            node = self.nodes.get(key)
+            if node is None:
+                self.nodes.store(key, Node(game))
+                self.playout(game)
+                break
+        value = (solver.evaluate(game) - start_value) / VALUE_SCALE
+        for node, i in path:
+            node.visits += 1
+            node.move_visits[i] += 1
+            node.move_values[i] += value
+        while len(game.log) > made:
+            game.pop()
+
+    def playout(self, game):
+        """ Make up to playout_depth random candidate moves """
+        for x in range(self.playout_depth):
+            if game.game_over:
+                return
+            moves = candidate_moves(game)
+            if not moves:
+                return
+            game.push(self.rng.choice(moves))
+
+
+def benchmark(seeds=range(10), suits=2, time_limit=0.05):
+    """ Print the simulations/sec and best move of a 50 ms hint on a few deals """
+    hints = HintEngine(seed=0)
+    print(f"{'seed':>5} {'sims':>6} {'sims/sec':>9} {'ms':>6}  best move")
+    for seed in seeds:
+        game = engine.SpiderEngine(engine.shuffled_deck(seed, suits))
+        result = hints.hint(game, time_limit)
+        best = result.moves[0] if result.moves else None
+        print(f"{seed:>5} {result.simulations:>6} {result.simulations_per_sec:>9.0f} "
+              f"{result.elapsed * 1000:>6.1f}  {best}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,101 @@
+"""
+Where the piles and cards go on the screen, worked out from the settings alone
+
+The game view places its sprites with these functions and the offscreen renderer
+draws with them, so the two always agree. Positions are the centres of mats and
+cards in arcade's coordinates: pixels right and up from the bottom left corner.
+
+The layout is a grid, so the card under a point and the pile a card is dropped
+on are worked out from the coordinates in a few steps, however many cards the
+piles hold, instead of testing the point against every sprite.
+"""
+import math
+
+import settings
+
+SUIT_LENGTH = len(settings.CARD_VALUES)
+PLAY_PILES = settings.PLAY_PILE_10 + 1
+
+
+def mat_position(pile_no):
+    """ Centre of the mat of a pile """
+    if pile_no == settings.BOTTOM_FACE_DOWN_PILE:
+        return settings.START_X, settings.BOTTOM_Y
+    if pile_no == settings.FOUNDATION_PILE:
+        return settings.TIMER_X, settings.TIMER_Y / 2
+    return settings.START_X + pile_no * settings.X_SPACING, settings.TOP_Y
+
+
+MAT_POSITIONS = [mat_position(pile_no) for pile_no in range(settings.PILE_COUNT)]
+
+
+def card_position(pile_no, index):
+    """ Centre of the card lying index cards up a pile """
+    mat_x, mat_y = MAT_POSITIONS[pile_no]
+    if pile_no == settings.BOTTOM_FACE_DOWN_PILE:
+        return mat_x, mat_y
+    if pile_no == settings.FOUNDATION_PILE:
+        # Every completed stack lies a little lower than the one before
+        return mat_x, mat_y - settings.CARD_VERTICAL_OFFSET * (index // SUIT_LENGTH)
+    return mat_x, mat_y - settings.CARD_VERTICAL_OFFSET * index
+
+
+def column_at(x):
+    """ Play pile whose column is nearest to x """
+    return min(max(round((x - settings.START_X) / settings.X_SPACING), 0), PLAY_PILES - 1)
+
+
+def top_slot_at(pile_no, slots, x, y):
+    """
+    Highest of the slots of a pile, counted from 0 at the mat and each lying one
+    vertical offset lower, whose card covers (x, y), or -1 if none does
+    """
+    mat_x, mat_y = MAT_POSITIONS[pile_no]
+    if not slots or abs(x - mat_x) > settings.CARD_WIDTH / 2:
+        return -1
+    # The card in slot n reaches up to mat_y + CARD_HEIGHT / 2 - n offsets: the lowest one reaching y is on top
+    slot = min(slots - 1, math.floor((mat_y + settings.CARD_HEIGHT / 2 - y) / settings.CARD_VERTICAL_OFFSET))
+    if slot < 0 or y < mat_y - settings.CARD_VERTICAL_OFFSET * slot - settings.CARD_HEIGHT / 2:
+        return -1
+    return slot
+
+
+def card_at(x, y, piles):
+    """
+    (pile, index) of the card drawn on top at (x, y), or None. piles holds the
+    cards of every pile, laid out by card_position()
+    """
+    hits = []
+    column = column_at(x)
+    index = top_slot_at(column, len(piles[column]), x, y)
+    if index >= 0:
+        hits.append((index, column))
+    stock = len(piles[settings.BOTTOM_FACE_DOWN_PILE])
+    if top_slot_at(settings.BOTTOM_FACE_DOWN_PILE, min(stock, 1), x, y) >= 0:
+        hits.append((stock - 1, settings.BOTTOM_FACE_DOWN_PILE))
+    # Only the last card of each completed stack shows
+    stack = top_slot_at(settings.FOUNDATION_PILE, len(piles[settings.FOUNDATION_PILE]) // SUIT_LENGTH, x, y)
+    if stack >= 0:
+        hits.append((stack * SUIT_LENGTH + SUIT_LENGTH - 1, settings.FOUNDATION_PILE))
+    if not hits:
+        return None
+    # Where piles overlap the card higher up its pile is drawn later
+    index, pile_no = max(hits)
+    return pile_no, index
+
+
+def drop_target(x, y, piles):
+    """
+    Play pile a card centred at (x, y) is dropped on: the nearest column, if the card
+    touches that pile's top card or its mat. None otherwise
+    """
+    pile_no = column_at(x)
+    mat_x, mat_y = MAT_POSITIONS[pile_no]
+    if (abs(x - mat_x) < (settings.CARD_WIDTH + settings.MAT_WIDTH) / 2
+            and abs(y - mat_y) < (settings.CARD_HEIGHT + settings.MAT_HEIGHT) / 2):
+        return pile_no
+    if piles[pile_no]:
+        card_x, card_y = card_position(pile_no, len(piles[pile_no]) - 1)
+        if abs(x - card_x) < settings.CARD_WIDTH and abs(y - card_y) < settings.CARD_HEIGHT:
+            return pile_no
+    return None
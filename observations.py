@@ -0,0 +1,115 @@
+"""
+Fixed-shape observations of SpiderEngine positions for learning agents
+
+ObservationEncoder keeps its output in preallocated arrays and, when it sees the
+same game again, only re-encodes the play piles whose version changed since the
+last call. Two layouts share the work:
+
+    planes  int8 (10, depth)    card code per pile slot, bottom card first,
+                                HIDDEN for face down cards and EMPTY past the top
+    flat    float32             per pile: its depth slots then PILE_FEATURES,
+                                followed by GLOBAL_FEATURES
+
+A pile deeper than depth shows only its top depth cards.
+"""
+import random
+import time
+
+import numpy as np
+
+import engine
+
+EMPTY = -1
+HIDDEN = engine.CARD_CODES
+PLAY_PILES = len(engine.TABLEAU)
+# Face down cards, face up cards, cards in the movable run, value of the top card + 1 (0 if empty)
+PILE_FEATURES = 4
+# Cards left in the stock, suits completed
+GLOBAL_FEATURES = 2
+
+
+class ObservationEncoder:
+    """ Encodes positions into reused arrays, redoing only the piles that changed """
+
+    def __init__(self, depth=64):
+        self.depth = depth
+        self.block = depth + PILE_FEATURES
+        self.planes = np.full((PLAY_PILES, depth), EMPTY, dtype=np.int8)
+        self.flat = np.zeros(PLAY_PILES * self.block + GLOBAL_FEATURES, dtype=np.float32)
+        # flat seen as one row per pile, plus the global features at the end
+        self.blocks = self.flat[:PLAY_PILES * self.block].reshape(PLAY_PILES, self.block)
+        self.globals = self.flat[PLAY_PILES * self.block:]
+        # Game last encoded and the pile versions it had then
+        self.game = None
+        self.versions = None
+
+    def update(self, game):
+        """ Bring both layouts up to date with game """
+        if game is not self.game:
+            self.game = game
+            self.versions = [-1] * PLAY_PILES
+        versions = game.versions
+        for pile_no in engine.TABLEAU:
+            if versions[pile_no] != self.versions[pile_no]:
+                self.versions[pile_no] = versions[pile_no]
+                self.encode_pile(game, pile_no)
+        self.globals[0] = len(game.piles[engine.STOCK])
+        self.globals[1] = len(game.piles[engine.FOUNDATION]) // engine.SUIT_LENGTH
+
+    def encode_pile(self, game, pile_no):
+        """ Re-encode one play pile into both layouts """
+        pile = game.piles[pile_no]
+        length = len(pile)
+        face_down = game.face_down[pile_no]
+        shown = min(length, self.depth)
+        row = self.planes[pile_no]
+        row[:shown] = np.frombuffer(pile, dtype=np.uint8)[length - shown:]
+        row[:max(face_down - (length - shown), 0)] = HIDDEN
+        row[shown:] = EMPTY
+        block = self.blocks[pile_no]
+        block[:self.depth] = row
+        block[self.depth] = face_down
+        block[self.depth + 1] = length - face_down
+        block[self.depth + 2] = length - game.run_start(pile_no) if pile else 0
+        block[self.depth + 3] = engine.VALUE[pile[-1]] + 1 if pile else 0
+
+    def encode(self, game):
+        """ Flat float32 observation. The array is reused by the next call """
+        self.update(game)
+        return self.flat
+
+    def encode_planes(self, game):
+        """ (pile, depth) int8 observation. The array is reused by the next call """
+        self.update(game)
+        return self.planes
+
+
+def benchmark(games=50, moves=200, seed=0):
+    """ Time encoding after every move, incrementally and from scratch """
+    rng = random.Random(seed)
+    positions = 0
+    incremental = scratch = 0.0
+    encoder = ObservationEncoder()
+    full = ObservationEncoder()
+    for game_no in range(games):
+        game = engine.SpiderEngine(engine.shuffled_deck(game_no))
+        for x in range(moves):
+            legal = game.legal_moves()
+            if not legal:
+                break
+            game.apply(rng.choice(legal))
+            start = time.perf_counter()
+            encoder.encode(game)
+            incremental += time.perf_counter() - start
+            start = time.perf_counter()
+            # Forget the last game, so every pile gets encoded
+            full.game = None
+            full.encode(game)
+            scratch += time.perf_counter() - start
+            positions += 1
+    print(f"{'incremental':>12} {incremental / positions * 1e6:8.2f} us/step")
+    print(f"{'scratch':>12} {scratch / positions * 1e6:8.2f} us/step")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,216 @@
+"""
+Opt-in timers and counters for the game's hot paths
+
+Functions decorated with timed(name) and blocks run under PROFILER.timer(name) are
+timed only while PROFILER is enabled. Otherwise they cost one attribute check, so
+the instrumentation can stay in. While enabled the profiler keeps:
+
+    per name    calls, total, mean and longest time
+    counters    numbers bumped with PROFILER.count(name)
+    frames      the time spent in handlers in each of the last frames, as
+                percentiles and a histogram
+    trace       every timed call, saved as a Chrome trace (chrome://tracing or
+                Perfetto) with the summary in its "otherData"
+
+Only the outermost timed call of a nest adds to the frame time, so nothing is
+counted twice. PROFILER.new_frame() marks where a frame starts.
+"""
+import functools
+import json
+import os
+import time
+from collections import deque
+
+# Upper ends of the frame time histogram's buckets, in ms
+BUCKETS = [1, 2, 4, 8, 16, 33, float("inf")]
+
+
+class Stats:
+    """ Timings of one name """
+
+    __slots__ = ["calls", "total", "longest"]
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.longest = 0.0
+
+
+class Profiler:
+    """ Collects timings while enabled, see the module docstring """
+
+    def __init__(self, frames=240, trace_limit=200_000):
+        self.enabled = False
+        self.frames = deque(maxlen=frames)
+        self.trace = deque(maxlen=trace_limit)
+        self.reset()
+
+    def reset(self):
+        """ Forget everything collected so far """
+        self.stats = {}
+        self.counters = {}
+        self.frames.clear()
+        self.trace.clear()
+        self.origin = time.perf_counter()
+        # Time spent in outermost timed calls since the frame started, and how deep the calls are now
+        self.frame_time = 0.0
+        self.depth = 0
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def record(self, name, start, end):
+        """ Add one timed call """
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = Stats()
+        duration = end - start
+        stats.calls += 1
+        stats.total += duration
+        if duration > stats.longest:
+            stats.longest = duration
+        if not self.depth:
+            self.frame_time += duration
+        self.trace.append((name, start, duration))
+
+    def timer(self, name):
+        """ Context manager timing a block under name """
+        return Timer(self, name)
+
+    def count(self, name, amount=1):
+        """ Bump a counter """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def new_frame(self):
+        """ Close the frame before, a new one starts now """
+        if self.enabled:
+            self.frames.append(self.frame_time)
+            self.frame_time = 0.0
+
+    def frame_percentile(self, share):
+        """ Frame time in ms that share of the recent frames stay within """
+        if not self.frames:
+            return 0.0
+        frames = sorted(self.frames)
+        return frames[min(int(share * len(frames)), len(frames) - 1)] * 1000
+
+    def histogram(self):
+        """ Number of recent frames in each of BUCKETS """
+        counts = [0] * len(BUCKETS)
+        for frame_time in self.frames:
+            ms = frame_time * 1000
+            for i, limit in enumerate(BUCKETS):
+                if ms < limit:
+                    counts[i] += 1
+                    break
+        return counts
+
+    def summary(self):
+        """ Everything but the trace, as plain data """
+        return {
+            "timers": {name: {"calls": stats.calls, "total_ms": stats.total * 1000,
+                              "mean_ms": stats.total / stats.calls * 1000, "max_ms": stats.longest * 1000}
+                       for name, stats in self.stats.items()},
+            "counters": dict(self.counters),
+            "frames": {"count": len(self.frames), "p50_ms": self.frame_percentile(0.5),
+                       "p95_ms": self.frame_percentile(0.95), "max_ms": self.frame_percentile(1.0),
+                       "histogram": dict(zip([f"<{limit}ms" for limit in BUCKETS[:-1]] + ["slower"],
+                                             self.histogram()))},
+        }
+
+    def report(self, rows=8):
+        """ A few lines of text for an on-screen overlay """
+        summary = self.summary()
+        frames = summary["frames"]
+        lines = [f"frames {frames['count']}  p50 {frames['p50_ms']:.1f} ms  p95 {frames['p95_ms']:.1f} ms  "
+                 f"max {frames['max_ms']:.1f} ms",
+                 "  ".join(f"{bucket} {count}" for bucket, count in frames["histogram"].items()),
+                 f"{'':<28}{'calls':>7}{'mean ms':>9}{'max ms':>8}"]
+        timers = sorted(summary["timers"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, timer in timers[:rows]:
+            lines.append(f"{name:<28}{timer['calls']:>7}{timer['mean_ms']:>9.2f}{timer['max_ms']:>8.2f}")
+        lines.extend(f"{name:<28}{count:>7}" for name, count in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+    def save(self, path):
+        """ Write the trace and the summary as a Chrome trace file, returning its path """
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": (start - self.origin) * 1e6, "dur": duration * 1e6,
+                   "pid": pid, "tid": 0} for name, start, duration in self.trace]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary()}, file)
+        return os.path.abspath(path)
+
+
+class Timer:
+    """ Context manager made by Profiler.timer """
+
+    __slots__ = ["profiler", "name", "start"]
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        if profiler.enabled:
+            self.start = time.perf_counter()
+            profiler.depth += 1
+        else:
+            self.start = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            end = time.perf_counter()
+            self.profiler.depth -= 1
+            self.profiler.record(self.name, self.start, end)
+
+
+# The profiler the game reports to
+PROFILER = Profiler()
+
+
+def timed(name, profiler=PROFILER):
+    """ Decorator timing every call of a function under name while profiler is enabled """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            profiler.depth += 1
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                profiler.depth -= 1
+                profiler.record(name, start, end)
+        return wrapper
+    return decorate
+
+
+def benchmark(calls=1_000_000):
+    """ Overhead of a timed function call, with the profiler off and on """
+    profiler = Profiler(trace_limit=calls)
+
+    def plain():
+        pass
+
+    wrapped = timed("plain", profiler)(plain)
+    for name, function, enabled in [("plain", plain, False), ("timed, off", wrapped, False),
+                                    ("timed, on", wrapped, True)]:
+        profiler.enabled = enabled
+        start = time.perf_counter()
+        for x in range(calls):
+            function()
+        print(f"{name:>12} {(time.perf_counter() - start) / calls * 1e9:8.1f} ns/call")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,150 @@
+"""
+Offscreen rendering of positions into NumPy RGB arrays, with no window and no GL
+
+The card images are loaded once with Pillow, scaled, and kept as arrays along with
+a mask of their opaque pixels. A frame starts as a copy of the cached empty table
+(felt and mats), then the cards are copied onto it pile by pile, bottom card first.
+Only the part of a card that can still be seen is copied: the strip above the next
+card of a fanned out pile, and nothing under the top card of a stack. The timer,
+score and buttons are not drawn.
+"""
+import importlib.util
+import math
+import os
+import random
+import time
+
+import numpy as np
+from PIL import Image
+
+import engine
+import layout
+import settings
+
+# Image index of the card back, after the 52 faces
+BACK = engine.CARD_CODES
+# Share of a card's height its rounded corners take up
+CORNER = 0.05
+
+
+def resource_path(name):
+    """ File of an arcade ":resources:" name, found without importing arcade """
+    if name.startswith(":resources:"):
+        package = importlib.util.find_spec("arcade").submodule_search_locations[0]
+        return os.path.join(package, "resources", name[len(":resources:"):].lstrip("/"))
+    return name
+
+
+def card_image_names():
+    """ Image of every card code, then of the card back """
+    names = [f":resources:images/cards/card{settings.CARD_SUITS[engine.SUIT[code]]}"
+             f"{settings.CARD_VALUES[engine.VALUE[code]]}.png" for code in range(engine.CARD_CODES)]
+    return names + [settings.FACE_DOWN_IMAGE]
+
+
+class Renderer:
+    """ Draws positions into one reused (height, width, 3) uint8 frame """
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.width = round(settings.SCREEN_WIDTH * scale)
+        self.height = round(settings.SCREEN_HEIGHT * scale)
+        self.card_width = round(settings.CARD_WIDTH * scale)
+        self.card_height = round(settings.CARD_HEIGHT * scale)
+        # Rows of a card left showing under the next card of a fanned out pile
+        self.strip = min(math.ceil(settings.CARD_VERTICAL_OFFSET * scale + self.card_height * CORNER),
+                         self.card_height)
+        images = []
+        for name in card_image_names():
+            with Image.open(resource_path(name)) as image:
+                images.append(np.asarray(image.convert("RGBA").resize(
+                    (self.card_width, self.card_height), Image.Resampling.LANCZOS)))
+        images = np.stack(images)
+        self.images = np.ascontiguousarray(images[..., :3])
+        self.masks = images[..., 3] >= 128
+        # Only the rows with the rounded corners need the mask, the ones between are opaque
+        opaque = self.masks.all(axis=(0, 2))
+        edge = int(opaque.argmax())
+        self.bands = [(0, edge, True), (edge, self.card_height - edge, False),
+                      (self.card_height - edge, self.card_height, True)]
+        self.table = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.table[:] = settings.TABLE_COLOR
+        mat_width = round(settings.MAT_WIDTH * scale)
+        mat_height = round(settings.MAT_HEIGHT * scale)
+        for x, y in layout.MAT_POSITIONS:
+            top, left = self.corner(x, y, mat_width, mat_height)
+            self.table[max(top, 0):max(top + mat_height, 0), max(left, 0):max(left + mat_width, 0)] = settings.MAT_COLOR
+        self.frame = np.empty_like(self.table)
+
+    def corner(self, x, y, width, height):
+        """ Row and column of the top left pixel of a box centred on screen point (x, y) """
+        return round(self.height - y * self.scale - height / 2), round(x * self.scale - width / 2)
+
+    def draw_card(self, frame, image, x, y, rows):
+        """ Copy the top rows of a card image onto the frame, clipped to its edges """
+        top, left = self.corner(x, y, self.card_width, self.card_height)
+        # Rows and columns of the image that land on the frame
+        first_row = max(-top, 0)
+        last_row = min(rows, self.height - top)
+        first_column = max(-left, 0)
+        last_column = min(self.card_width, self.width - left)
+        if first_column >= last_column:
+            return
+        for start, stop, masked in self.bands:
+            start = max(start, first_row)
+            stop = min(stop, last_row)
+            if start >= stop:
+                continue
+            target = frame[top + start:top + stop, left + first_column:left + last_column]
+            source = self.images[image, start:stop, first_column:last_column]
+            if masked:
+                np.copyto(target, source, where=self.masks[image, start:stop, first_column:last_column, None])
+            else:
+                target[...] = source
+
+    def render(self, game):
+        """ The position of an engine as a (height, width, 3) uint8 array. The array is reused by the next call """
+        frame = self.frame
+        np.copyto(frame, self.table)
+        height = self.card_height
+        for pile_no in engine.TABLEAU:
+            pile = game.piles[pile_no]
+            face_down = game.face_down[pile_no]
+            last = len(pile) - 1
+            for i, code in enumerate(pile):
+                x, y = layout.card_position(pile_no, i)
+                self.draw_card(frame, BACK if i < face_down else code, x, y, height if i == last else self.strip)
+        if game.piles[engine.STOCK]:
+            x, y = layout.MAT_POSITIONS[engine.STOCK]
+            self.draw_card(frame, BACK, x, y, height)
+        foundation = game.piles[engine.FOUNDATION]
+        # Only the last card, the King, of every completed stack shows
+        for i in range(engine.SUIT_LENGTH - 1, len(foundation), engine.SUIT_LENGTH):
+            x, y = layout.card_position(engine.FOUNDATION, i)
+            self.draw_card(frame, foundation[i], x, y, height)
+        return frame
+
+
+def benchmark(frames=500, scale=1.0, seed=0):
+    """ Time rendering random mid-game positions """
+    rng = random.Random(seed)
+    games = []
+    for game_no in range(50):
+        game = engine.SpiderEngine(engine.shuffled_deck(game_no))
+        for x in range(rng.randrange(20, 200)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+            game.apply(rng.choice(moves))
+        games.append(game)
+    start = time.perf_counter()
+    renderer = Renderer(scale)
+    print(f"{'setup':>8} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    start = time.perf_counter()
+    for frame_no in range(frames):
+        renderer.render(games[frame_no % len(games)])
+    print(f"{'render':>8} {frames / (time.perf_counter() - start):8.0f} frames/sec at {renderer.width}x{renderer.height}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,117 @@
+"""
+Parallel self-play: seeded games played by a policy in a pool of worker processes
+"""
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import engine
+
+# One finished game: its seed, the moves made packed three bytes per move
+# (source, index, target), the score and whether every suit was completed
+GameResult = namedtuple("GameResult", ["seed", "moves", "score", "won"])
+
+# Set once per worker process by _init_worker
+_policy = None
+_max_moves = None
+
+
+def random_policy(game, moves, rng):
+    """ Pick any legal move """
+    return rng.choice(moves)
+
+
+def play_game(seed, policy=random_policy, max_moves=1000):
+    """
+    Play the game dealt from seed until it is won, stuck or max_moves long.
+    policy(game, moves, rng) picks one of the legal moves.
+    """
+    game = engine.SpiderEngine(engine.shuffled_deck(seed))
+    rng = random.Random(seed)
+    trajectory = bytearray()
+    while not game.game_over and game.no_of_moves_made < max_moves:
+        moves = game.legal_moves()
+        if not moves:
+            break
+        move = policy(game, moves, rng)
+        game.apply(move)
+        trajectory.extend(move)
+    return GameResult(seed, bytes(trajectory), game.score, game.game_over)
+
+
+def replay(result):
+    """ Yield (game, move) for every move of a GameResult, the game as it was before the move """
+    game = engine.SpiderEngine(engine.shuffled_deck(result.seed))
+    moves = result.moves
+    for i in range(0, len(moves), 3):
+        move = tuple(moves[i:i + 3])
+        yield game, move
+        game.apply(move)
+
+
+def _init_worker(policy, max_moves):
+    """ Runs once when a worker process starts """
+    global _policy, _max_moves
+    _policy = policy
+    _max_moves = max_moves
+
+
+def _play_batch(seeds):
+    """ Play a batch of games inside a worker """
+    return [play_game(seed, _policy, _max_moves) for seed in seeds]
+
+
+class RolloutRunner:
+    """
+    Pool of worker processes that are set up once and reused for every game.
+    The policy must be picklable, e.g. a module level function.
+    """
+
+    def __init__(self, workers=None, policy=random_policy, max_moves=1000, batch_size=32):
+        self.workers = workers or os.cpu_count()
+        self.batch_size = batch_size
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(policy, max_moves))
+
+    def run(self, seeds):
+        """ Play a game for every seed, yielding GameResults as soon as their batch is done """
+        seeds = list(seeds)
+        futures = [self.executor.submit(_play_batch, seeds[i:i + self.batch_size])
+                   for i in range(0, len(seeds), self.batch_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+    def warm_up(self):
+        """ Start every worker process before timing anything """
+        list(self.run(range(self.workers)))
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def scaling_report(max_workers=None, games=2000, max_moves=500):
+    """ Print games/sec with 1 to max_workers worker processes """
+    max_workers = max_workers or os.cpu_count()
+    print(f"{'workers':>7} {'games/sec':>10} {'speedup':>8}")
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        with RolloutRunner(workers, max_moves=max_moves) as runner:
+            runner.warm_up()
+            start = time.perf_counter()
+            count = sum(1 for result in runner.run(range(games)))
+            rate = games / (time.perf_counter() - start)
+        assert count == games
+        baseline = baseline or rate
+        print(f"{workers:>7} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    scaling_report()
@@ -24,6 +24,8 @@ START_X = MAT_WIDTH / 2 + MAT_WIDTH * HORIZONTAL_MARGIN_PERCENT
 # Card constants
 CARD_VALUES = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
 CARD_SUITS = ["Clubs", "Hearts", "Spades", "Diamonds"]
+# How many of the suits are played with: 1, 2 or 4
+SUIT_COUNT = 4
 
 # Screen title and size
 SCREEN_WIDTH = 1280
@@ -37,6 +39,10 @@ BUTTON_Y = SCREEN_HEIGHT - 100
 # Face down image
 FACE_DOWN_IMAGE = ":resources:images/cards/cardBack_red2.png"
 
+# Colours of the table and of the mats (arcade.color.AMAZON and arcade.csscolor.DARK_OLIVE_GREEN)
+TABLE_COLOR = (59, 122, 87)
+MAT_COLOR = (85, 107, 47)
+
 # The Y of the top row (10 piles)
 TOP_Y = SCREEN_HEIGHT - MAT_HEIGHT / 2 - MAT_HEIGHT * VERTICAL_MARGIN_PERCENT
 
@@ -50,6 +56,9 @@ CARD_VERTICAL_OFFSET = CARD_HEIGHT * CARD_SCALE * 0.3
 TIMER_X = SCREEN_WIDTH - 80
 TIMER_Y = TOP_Y + MAT_HEIGHT / 2
 SCORE_Y = TIMER_Y - 15
+STATUS_Y = SCORE_Y - 15
+# Show hundredths of a second on the running timer? They change every frame, so the timer text is laid out every frame
+TIMER_HUNDREDTHS = False
 
 # Start and end screens
 
@@ -69,3 +78,34 @@ PLAY_PILE_10 = 9
 BOTTOM_FACE_DOWN_PILE = 10
 FOUNDATION_PILE = 11
 
+
+# Scoring
+START_SCORE = 500
+# Turning over a card
+FLIP_POINTS = 10
+# Completing a suit from King to Ace
+STACK_POINTS = 130
+
+# Most moves the command log remembers for undo, None for no limit
+UNDO_LIMIT = None
+
+# Time a move hint may take, in seconds, and how many of the best moves are shown
+HINT_TIME = 0.05
+HINT_COUNT = 3
+
+# Only draw frames when something on screen changed, and update at IDLE_UPDATE_RATE once
+# nothing has happened for IDLE_DELAY seconds. Rates are in seconds between updates
+IDLE_RENDERING = True
+UPDATE_RATE = 1 / 60
+IDLE_UPDATE_RATE = 1 / 4
+IDLE_DELAY = 2.0
+# Step of the game clock in seconds: game time only grows in whole steps, whatever the update rate
+TIME_STEP = 1 / 60
+
+# File the profiler (P key) saves its trace to, and seconds between overlay refreshes
+PROFILE_FILE = "profile_trace.json"
+PROFILE_REFRESH = 0.25
+
+# Budget of the background check for a game that can no longer be won
+DEAD_GAME_NODES = 100_000
+DEAD_GAME_TIME = 2.0
@@ -0,0 +1,191 @@
+"""
+Spider solver and dead-game detector
+
+The solver sees every card, face down ones included. It runs a best-first search
+over engine positions, expanding the position that looks closest to a win and
+never expanding a position twice. Positions are told apart by their Zobrist key,
+or by another key function such as canonical.search_key, which also merges
+positions that only differ in the order of the play piles.
+Moves that only shuffle a run between equivalent places are put off until every
+other position has been expanded: they rarely help, but now and then one frees
+the card under the run. The only moves left out are the ones that just swap two
+play piles, so STUCK means that no winning line exists at all.
+"""
+import heapq
+import time
+from collections import namedtuple
+from itertools import count
+
+import engine
+
+WIN = "win"
+STUCK = "stuck"
+UNKNOWN = "unknown"
+
+# Evaluation weights
+COMPLETED_CARD = 80
+SAME_SUIT_LINK = 15
+VALUE_LINK = 3
+BROKEN_LINK = -20
+EMPTY_PILE = 50
+FACE_DOWN_CARD = -10
+STOCK_CARD = -3
+
+
+class SolveResult(namedtuple("SolveResult", ["status", "line", "nodes", "elapsed"])):
+    """
+    status is WIN, STUCK or UNKNOWN (the budget ran out first).
+    line is the list of moves that wins the game when status is WIN.
+    """
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+
+def evaluate(game):
+    """ How promising a position looks, higher is better """
+    value = len(game.piles[engine.FOUNDATION]) * COMPLETED_CARD + len(game.piles[engine.STOCK]) * STOCK_CARD
+    for pile_no in engine.TABLEAU:
+        pile = game.piles[pile_no]
+        if not pile:
+            value += EMPTY_PILE
+            continue
+        face_down = game.face_down[pile_no]
+        value += face_down * FACE_DOWN_CARD
+        for index in range(max(face_down, 1), len(pile)):
+            card = pile[index]
+            below = pile[index - 1]
+            if below == engine.NEXT_UP[card]:
+                value += SAME_SUIT_LINK
+            elif engine.VALUE[below] == engine.VALUE[card] + 1:
+                value += VALUE_LINK
+            else:
+                value += BROKEN_LINK
+    return value
+
+
+def is_useful(game, move):
+    """
+    Is the move worth trying before the rest? Not if it takes a run off a card it
+    already fits on without joining a same-suit run, splits a run into an empty
+    pile or moves a whole pile into one.
+    """
+    source, index, target = move
+    if source == engine.STOCK:
+        return True
+    pile = game.piles[source]
+    card = pile[index]
+    target_pile = game.piles[target]
+    on_parent = index > game.face_down[source] and engine.VALUE[pile[index - 1]] == engine.VALUE[card] + 1
+    on_same_suit = on_parent and pile[index - 1] == engine.NEXT_UP[card]
+    if not target_pile:
+        return index > 0 and not on_same_suit and index == game.run_start(source)
+    if not on_parent:
+        return True
+    return target_pile[-1] == engine.NEXT_UP[card] and not on_same_suit
+
+
+def is_symmetric(game, move):
+    """
+    Does the move only swap two play piles? Moving a whole pile into an empty one
+    does, once the stock is empty. Before that the piles get different deals.
+    """
+    source, index, target = move
+    return (source != engine.STOCK and index == 0 and not game.piles[target]
+            and not game.piles[engine.STOCK])
+
+
+class Solver:
+    """ Best-first search for a winning line within a node and time budget """
+
+    def __init__(self, max_nodes=200_000, time_limit=1.0, key=None):
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        # Function telling positions apart
+        self.key = key or position_key
+        self.nodes = 0
+
+    def solve(self, root):
+        """ Is the position winnable, stuck or undecided within the budget? """
+        if root.game_over:
+            return SolveResult(WIN, [], 0, 0.0)
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+        self.nodes = 0
+        key = self.key
+        root_key = key(root)
+        # Move that first reached each position, and the key of the position it came from
+        parents = {root_key: None}
+        tie_breaker = count()
+        # Newer positions win ties, which makes the search dive instead of spreading out
+        frontier = [(-evaluate(root), 0, root_key, root)]
+        # (key, position, move) of the moves is_useful() turns down, made once the frontier runs out
+        deferred = []
+
+        status = STUCK
+        while frontier or deferred:
+            if self.nodes >= self.max_nodes or time.perf_counter() >= deadline:
+                status = UNKNOWN
+                break
+            if frontier:
+                x, x, game_key, game = heapq.heappop(frontier)
+                moves = []
+                for move in game.legal_moves():
+                    if is_symmetric(game, move):
+                        continue
+                    if is_useful(game, move):
+                        moves.append(move)
+                    else:
+                        deferred.append((game_key, game, move))
+            else:
+                game_key, game, move = deferred.pop()
+                moves = [move]
+            for move in moves:
+                child = game.copy()
+                child.apply(move)
+                self.nodes += 1
+                child_key = key(child)
+                if child_key in parents:
+                    continue
+                parents[child_key] = (game_key, move)
+                if child.game_over:
+                    return SolveResult(WIN, self.line(parents, child_key), self.nodes,
+                                       time.perf_counter() - start)
+                heapq.heappush(frontier, (-evaluate(child), -next(tie_breaker), child_key, child))
+        return SolveResult(status, None, self.nodes, time.perf_counter() - start)
+
+    @staticmethod
+    def line(parents, key):
+        """ Moves leading from the root to the position with this key """
+        line = []
+        while parents[key] is not None:
+            key, move = parents[key]
+            line.append(move)
+        line.reverse()
+        return line
+
+
+def position_key(game):
+    """ Zobrist key of a position, telling apart positions that are only symmetric """
+    return game.key
+
+
+def solve(game, max_nodes=200_000, time_limit=1.0):
+    """ Solve a position with a default Solver """
+    return Solver(max_nodes, time_limit).solve(game)
+
+
+def benchmark(seeds=range(20), suits=2, time_limit=1.0):
+    """ Print the verdict, nodes and nodes/sec for a few seeded deals """
+    print(f"{'seed':>5} {'status':>8} {'moves':>6} {'nodes':>8} {'secs':>6} {'nodes/sec':>10}")
+    for seed in seeds:
+        game = engine.SpiderEngine(engine.shuffled_deck(seed, suits))
+        result = solve(game, max_nodes=10_000_000, time_limit=time_limit)
+        moves = len(result.line) if result.line else 0
+        print(f"{seed:>5} {result.status:>8} {moves:>6} {result.nodes:>8} "
+              f"{result.elapsed:>6.2f} {result.nodes_per_sec:>10.0f}")
+
+
+if __name__ == "__main__":
+    benchmark()
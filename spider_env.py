@@ -0,0 +1,106 @@
+"""
+Single-game Gymnasium environment over SpiderEngine
+"""
+import time
+
+import numpy as np
+import gymnasium as gym
+
+import actions
+import engine
+import observations
+import render
+
+
+class SpiderEnv(gym.Env):
+    """
+    One game of Spider. Actions are the ids of the actions module, observations come
+    from an ObservationEncoder ("flat" or "planes" layout) and the reward is the change
+    in score. Illegal actions leave the game as it is. info["action_mask"] holds
+    the legal actions of the new position. render_mode "rgb_array" draws the table
+    offscreen, render_scale times the size of the game window.
+    """
+
+    metadata = {"render_modes": ["rgb_array"], "render_fps": 30}
+
+    def __init__(self, suits=2, layout="flat", depth=64, max_episode_steps=1000, render_mode=None,
+                 render_scale=1.0):
+        if render_mode is not None and render_mode not in self.metadata["render_modes"]:
+            raise ValueError(f"Unknown render mode {render_mode!r}")
+        self.render_mode = render_mode
+        self.renderer = render.Renderer(render_scale) if render_mode == "rgb_array" else None
+        self.suits = suits
+        self.layout = layout
+        self.max_episode_steps = max_episode_steps
+        self.encoder = observations.ObservationEncoder(depth)
+        if layout == "flat":
+            self.observation_space = gym.spaces.Box(
+                observations.EMPTY, engine.DECK_SIZE, self.encoder.flat.shape, np.float32)
+        elif layout == "planes":
+            self.observation_space = gym.spaces.Box(
+                observations.EMPTY, observations.HIDDEN, self.encoder.planes.shape, np.int8)
+        else:
+            raise ValueError(f"Unknown observation layout {layout!r}")
+        self.action_space = gym.spaces.Discrete(actions.ACTION_COUNT)
+        self.mask = np.zeros(actions.ACTION_COUNT, dtype=bool)
+        self.game = None
+        self.deal = None
+        # Steps taken this episode, illegal ones included
+        self.steps = 0
+
+    def reset(self, *, seed=None, options=None):
+        """ Deal a new game. options={"deal": n} plays deal n of engine.shuffled_deck """
+        super().reset(seed=seed)
+        if options and "deal" in options:
+            self.deal = options["deal"]
+        else:
+            self.deal = int(self.np_random.integers(0, 1 << 63))
+        self.game = engine.SpiderEngine(engine.shuffled_deck(self.deal, self.suits))
+        self.steps = 0
+        actions.legal_mask(self.game, self.mask)
+        return self.observation(), {"action_mask": self.mask.copy(), "deal": self.deal}
+
+    def step(self, action):
+        game = self.game
+        score = game.score
+        self.steps += 1
+        if self.mask[action]:
+            game.apply(actions.action_to_move(game, action))
+        actions.legal_mask(game, self.mask)
+        terminated = game.game_over or not self.mask.any()
+        truncated = not terminated and self.steps >= self.max_episode_steps
+        info = {"action_mask": self.mask.copy()}
+        return self.observation(), float(game.score - score), terminated, truncated, info
+
+    def render(self):
+        """ (height, width, 3) uint8 picture of the table in "rgb_array" mode """
+        if self.renderer is None:
+            return None
+        return self.renderer.render(self.game).copy()
+
+    def action_masks(self):
+        """ Legal actions of the current position, for maskable policies """
+        return self.mask.copy()
+
+    def observation(self):
+        if self.layout == "flat":
+            return self.encoder.encode(self.game).copy()
+        return self.encoder.encode_planes(self.game).copy()
+
+
+def benchmark(steps=20_000, seed=0):
+    """ Time random legal steps """
+    env = SpiderEnv()
+    rng = np.random.default_rng(seed)
+    observation, info = env.reset(seed=seed)
+    start = time.perf_counter()
+    for x in range(steps):
+        action = rng.choice(np.flatnonzero(info["action_mask"]))
+        observation, reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            observation, info = env.reset()
+    print(f"{steps / (time.perf_counter() - start):10.0f} steps/sec")
+
+
+if __name__ == "__main__":
+    benchmark()
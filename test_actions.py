@@ -0,0 +1,32 @@
+"""
+Tests that the fixed action space covers exactly the engine's legal moves
+
+    python -m pytest test_actions.py
+"""
+import random
+
+import pytest
+
+import actions
+import engine
+
+SUITS = [1, 2, 4]
+SEEDS = range(5)
+MOVES = 300
+
+
+@pytest.mark.parametrize("suits", SUITS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_actions_round_trip_legal_moves(seed, suits):
+    game = engine.SpiderEngine(engine.shuffled_deck(seed, suits))
+    rng = random.Random(seed)
+    for x in range(MOVES):
+        moves = game.legal_moves()
+        legal = actions.legal_actions(game)
+        assert sorted(legal) == sorted(actions.move_to_action(game, move) for move in moves)
+        for move in moves:
+            assert actions.action_to_move(game, actions.move_to_action(game, move)) == move
+        assert actions.legal_mask(game).sum() == len(moves)
+        if not moves or game.game_over:
+            return
+        game.push(rng.choice(moves))
@@ -0,0 +1,32 @@
+"""
+Tests that batched deals are the engine's deals
+
+    python -m pytest test_deals.py
+"""
+import pytest
+
+import deals
+import engine
+
+SUITS = [1, 2, 4]
+# Small seeds and seeds using the high bits of the 64-bit state
+SEEDS = list(range(200)) + [2**32 - 1, 2**40 + 3, 2**63 + 5, 2**64 - 1]
+
+
+@pytest.mark.parametrize("suits", SUITS)
+def test_deal_batch_matches_shuffled_deck(suits):
+    batch = deals.deal_batch(SEEDS, suits)
+    for seed, deck in zip(SEEDS, batch):
+        assert bytes(deck) == bytes(engine.shuffled_deck(seed, suits))
+
+
+def test_corpus_looks_up_every_seed(tmp_path):
+    path = str(tmp_path / "deals.bin")
+    seeds = [5, 3, 2**40, 7]
+    deals.write_corpus(path, seeds, 2)
+    corpus = deals.DealCorpus(path)
+    assert len(corpus) == len(seeds)
+    for seed in seeds:
+        assert bytes(corpus.deck(seed)) == bytes(engine.shuffled_deck(seed, 2))
+    with pytest.raises(KeyError):
+        corpus.deck(4)
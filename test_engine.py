@@ -0,0 +1,79 @@
+"""
+Regression tests of the rules engine's invariants, over random play
+
+    python -m pytest test_engine.py
+"""
+import random
+
+import pytest
+
+import engine
+
+SUITS = [1, 2, 4]
+SEEDS = range(5)
+MOVES = 300
+
+
+def fresh(game):
+    """ The same position built from scratch, with keys and caches worked out anew """
+    return engine.SpiderEngine.from_piles(game.piles, game.face_down, game.score, game.no_of_moves_made)
+
+
+def caches(game):
+    return game.key, game.run_starts, game.wanted, game.accepts, game.empty
+
+
+def random_game(seed, suits):
+    """ A new game and an rng for random moves in it """
+    return engine.SpiderEngine(engine.shuffled_deck(seed, suits)), random.Random(seed)
+
+
+def play(game, rng, moves=MOVES):
+    """ push() random legal moves, yielding after each one """
+    for x in range(moves):
+        legal = game.legal_moves()
+        if not legal or game.game_over:
+            return
+        game.push(rng.choice(legal))
+        yield
+
+
+@pytest.mark.parametrize("suits", SUITS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_caches_match_fresh_position(seed, suits):
+    game, rng = random_game(seed, suits)
+    for x in play(game, rng):
+        assert caches(game) == caches(fresh(game))
+        assert game.legal_moves() == engine.rescan_legal_moves(game)
+
+
+@pytest.mark.parametrize("suits", SUITS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_pop_restores_every_position(seed, suits):
+    game, rng = random_game(seed, suits)
+    snapshots = [game.snapshot()]
+    for x in play(game, rng):
+        snapshots.append(game.snapshot())
+    snapshots.pop()
+    while snapshots:
+        game.pop()
+        assert game.snapshot() == snapshots.pop()
+        assert caches(game) == caches(fresh(game))
+        assert game.legal_moves() == engine.rescan_legal_moves(game)
+    assert not game.log
+
+
+@pytest.mark.parametrize("suits", SUITS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_redo_replays_to_same_position(seed, suits):
+    game, rng = random_game(seed, suits)
+    snapshots = []
+    for x in play(game, rng):
+        snapshots.append(game.snapshot())
+    for x in snapshots:
+        game.pop()
+    for snapshot in snapshots:
+        game.redo()
+        assert game.snapshot() == snapshot
+        assert caches(game) == caches(fresh(game))
+    assert not game.redo_log
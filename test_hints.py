@@ -0,0 +1,38 @@
+"""
+Tests that hints only use what the player can see
+
+    python -m pytest test_hints.py
+"""
+import random
+
+import engine
+import hints
+
+
+def hidden_cards(game):
+    return sorted(code for pile, count in zip(game.piles, game.face_down) for code in pile[:count])
+
+
+def swap_hidden(game, seed):
+    """ The same game as the player sees it, with its hidden cards in another order """
+    deal = hints.determinize(game, random.Random(seed))
+    assert deal.snapshot() != game.snapshot()
+    return deal
+
+
+def test_determinize_keeps_visible_cards():
+    game = engine.SpiderEngine(engine.shuffled_deck(3, 2))
+    deal = swap_hidden(game, 1)
+    assert deal.face_down == game.face_down
+    for pile, other, count in zip(game.piles, deal.piles, game.face_down):
+        assert pile[count:] == other[count:]
+    assert hidden_cards(deal) == hidden_cards(game)
+    assert hints.visible_key(deal) == hints.visible_key(game)
+
+
+def test_hint_ignores_hidden_cards():
+    game = engine.SpiderEngine(engine.shuffled_deck(3, 2))
+    deal = swap_hidden(game, 1)
+    first = hints.HintEngine(seed=0).hint(game, time_limit=60, max_simulations=200)
+    second = hints.HintEngine(seed=0).hint(deal, time_limit=60, max_simulations=200)
+    assert first.moves == second.moves
@@ -0,0 +1,32 @@
+"""
+Tests of the trajectory store's on-disk format
+
+    python -m pytest test_trajectories.py
+"""
+import os
+
+import numpy as np
+
+import engine
+import trajectories
+
+
+def test_append_after_torn_step(tmp_path):
+    directory = str(tmp_path)
+    with trajectories.TrajectoryWriter(directory, "shard") as writer:
+        first = trajectories.record_game(writer, 1, max_moves=50)
+    # A flush cut short: the last step's done flag never made it to disk
+    done = os.path.join(directory, "shard", "done.bin")
+    os.truncate(done, os.path.getsize(done) - 1)
+    with trajectories.TrajectoryWriter(directory, "shard") as writer:
+        second = trajectories.record_game(writer, 2, max_moves=50)
+
+    store = trajectories.TrajectoryStore(directory)
+    steps = first.no_of_moves_made - 1
+    assert len(store) == steps + second.no_of_moves_made
+    batch = store.take(np.arange(len(store)))
+    # The torn step is gone from every column and the second game lines up behind the first
+    assert not batch["done"][:steps].any()
+    assert list(np.flatnonzero(batch["done"])) == [len(store) - 1]
+    fresh = engine.SpiderEngine(engine.shuffled_deck(2))
+    assert bytes(batch["state"][steps]) == bytes(fresh.encode())
@@ -0,0 +1,60 @@
+"""
+Tests that the vectorized environment plays by the same rules as the engine
+
+    python -m pytest test_vec_env.py
+"""
+import numpy as np
+import pytest
+
+import actions
+import engine
+import vec_env
+
+ENVS = 16
+STEPS = 400
+
+
+def engine_of(env, game):
+    """ An engine holding the same position as one environment of the batch """
+    piles = [bytes(env.cards[game, pile_no, :env.lengths[game, pile_no]].astype(np.uint8))
+             for pile_no in range(engine.FOUNDATION)]
+    # The vectorized foundation keeps one Ace per completed suit, the engine the whole suits
+    foundation = bytes(env.lengths[game, engine.FOUNDATION] * engine.SUIT_LENGTH)
+    return engine.SpiderEngine.from_piles(piles + [foundation], env.face_down[game].tolist(), int(env.score[game]))
+
+
+def assert_same(env, game, other):
+    for pile_no in range(engine.FOUNDATION):
+        assert bytes(env.cards[game, pile_no, :env.lengths[game, pile_no]].astype(np.uint8)) == other.piles[pile_no]
+    assert env.lengths[game, engine.FOUNDATION] * engine.SUIT_LENGTH == len(other.piles[engine.FOUNDATION])
+    assert env.face_down[game].tolist() == other.face_down
+    assert env.score[game] == other.score
+    assert (env.action_mask[game] == actions.legal_mask(other)).all()
+
+
+def test_reset_deals_the_engine_deals():
+    env = vec_env.SpiderVecEnv(ENVS)
+    env.reset(seed=0)
+    for game in range(ENVS):
+        assert_same(env, game, engine.SpiderEngine(engine.shuffled_deck(int(env.seeds[game]))))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_play_matches_engine(seed):
+    env = vec_env.SpiderVecEnv(ENVS)
+    observations, infos = env.reset(seed=seed)
+    games = [engine_of(env, game) for game in range(ENVS)]
+    rng = np.random.default_rng(seed)
+    for step in range(STEPS):
+        chosen = np.argmax(rng.random(infos["action_mask"].shape) * infos["action_mask"], axis=1)
+        resetting = env._autoreset.copy()
+        observations, rewards, terminations, truncations, infos = env.step(chosen)
+        for game in range(ENVS):
+            if resetting[game]:
+                games[game] = engine_of(env, game)
+                continue
+            other = games[game]
+            score = other.score
+            other.apply(actions.action_to_move(other, int(chosen[game])))
+            assert rewards[game] == other.score - score
+            assert_same(env, game, other)
@@ -0,0 +1,216 @@
+"""
+Append-only, memory-mapped store of (state, legal mask, action, reward, done) steps
+
+A store is a directory with one shard directory per writer, so parallel rollout
+workers never write to the same file. A shard keeps every column in its own
+flat binary file of fixed-width rows:
+
+    state   uint8[128]  SpiderEngine.encode() of the position before the action
+    mask    uint8[163]  legal action ids (see the actions module) as packed bits
+    action  uint16      id of the action taken
+    reward  float32     change in score
+    done    uint8       1 on the last step of a game
+
+Rows only ever get appended, and a shard holds as many steps as its shortest
+column, so a half-written step is ignored by readers. A writer opening a shard
+cuts every column back to that many steps before it appends, so the next steps
+line up again.
+"""
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+import actions
+import canonical
+import engine
+import rollout
+
+MASK_BITS = actions.ACTION_COUNT
+
+# Column name: (dtype, shape of one row)
+COLUMNS = {
+    "state": (np.uint8, (engine.STATE_SIZE,)),
+    "mask": (np.uint8, ((MASK_BITS + 7) // 8,)),
+    "action": (np.uint16, ()),
+    "reward": (np.float32, ()),
+    "done": (np.uint8, ()),
+}
+# Bytes in one row of each column
+WIDTHS = {name: np.dtype(dtype).itemsize * int(np.prod(shape)) for name, (dtype, shape) in COLUMNS.items()}
+
+
+def column_path(path, name):
+    return os.path.join(path, f"{name}.bin")
+
+
+def complete_steps(path):
+    """ Number of steps every column of a shard holds in full """
+    sizes = [os.path.getsize(column_path(path, name)) if os.path.exists(column_path(path, name)) else 0
+             for name in COLUMNS]
+    return min(size // WIDTHS[name] for size, name in zip(sizes, COLUMNS))
+
+
+class TrajectoryWriter:
+    """ Appends steps to one shard of a store, buffering buffer_size steps in memory """
+
+    def __init__(self, directory, shard, buffer_size=4096):
+        self.path = os.path.join(directory, shard)
+        os.makedirs(self.path, exist_ok=True)
+        # Drop the rows of a step an earlier writer left half written
+        steps = complete_steps(self.path)
+        self.files = {name: open(column_path(self.path, name), "ab") for name in COLUMNS}
+        for name, file in self.files.items():
+            file.truncate(steps * WIDTHS[name])
+        self.buffers = {name: np.zeros((buffer_size, *shape), dtype) for name, (dtype, shape) in COLUMNS.items()}
+        self.buffer_size = buffer_size
+        self.count = 0
+
+    def append(self, state, mask, action, reward, done):
+        """ Add one step. mask is a bool array of MASK_BITS legal flags """
+        row = self.count
+        buffers = self.buffers
+        buffers["state"][row] = np.frombuffer(state, dtype=np.uint8)
+        buffers["mask"][row] = np.packbits(mask)
+        buffers["action"][row] = action
+        buffers["reward"][row] = reward
+        buffers["done"][row] = done
+        self.count += 1
+        if self.count == self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ Write the buffered steps to disk """
+        for name, file in self.files.items():
+            file.write(self.buffers[name][:self.count].tobytes())
+            file.flush()
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrajectoryStore:
+    """ Read-only view of every shard of a store, as memory-mapped NumPy arrays """
+
+    def __init__(self, directory):
+        self.shards = []
+        for shard in sorted(os.listdir(directory)):
+            path = os.path.join(directory, shard)
+            if os.path.isdir(path):
+                self.shards.append(self.open_shard(path))
+        self.shards = [shard for shard in self.shards if len(shard["done"])]
+        sizes = [len(shard["done"]) for shard in self.shards]
+        # Index of the first step of every shard, and the total at the end
+        self.offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+
+    @staticmethod
+    def open_shard(path):
+        """ Columns of one shard, cut to the number of complete steps """
+        count = complete_steps(path)
+        columns = {}
+        for name, (dtype, shape) in COLUMNS.items():
+            if count:
+                columns[name] = np.memmap(column_path(path, name), dtype=dtype, mode="r", shape=(count, *shape))
+            else:
+                columns[name] = np.zeros((0, *shape), dtype)
+        return columns
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def views(self):
+        """ Yield the columns of every shard in turn, as zero-copy memory-mapped arrays """
+        yield from self.shards
+
+    def take(self, indices):
+        """ The steps at these indices, gathered from every shard into new arrays """
+        indices = np.asarray(indices, dtype=np.int64)
+        shard_of = np.searchsorted(self.offsets, indices, side="right") - 1
+        batch = {name: np.empty((len(indices), *shape), dtype) for name, (dtype, shape) in COLUMNS.items()}
+        for shard_no in np.unique(shard_of):
+            rows = shard_of == shard_no
+            local = indices[rows] - self.offsets[shard_no]
+            for name, column in self.shards[shard_no].items():
+                batch[name][rows] = column[local]
+        batch["mask"] = np.unpackbits(batch["mask"], axis=1, count=MASK_BITS).astype(bool)
+        return batch
+
+    def unique_indices(self):
+        """
+        Index of the first step of every distinct position, positions that only
+        differ by a symmetry counting as one (see canonical.state_key)
+        """
+        seen = set()
+        unique = []
+        index = 0
+        for shard in self.shards:
+            for state in shard["state"]:
+                key = canonical.state_key(state)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(index)
+                index += 1
+        return np.array(unique, dtype=np.int64)
+
+    def minibatches(self, batch_size, rng=None, epochs=1):
+        """ Yield shuffled minibatches over every step, once per epoch """
+        rng = rng or np.random.default_rng()
+        for epoch in range(epochs):
+            order = rng.permutation(len(self))
+            for start in range(0, len(order), batch_size):
+                # Sorted indices read the memory maps in file order
+                yield self.take(np.sort(order[start:start + batch_size]))
+
+
+def record_game(writer, seed, policy=rollout.random_policy, max_moves=1000):
+    """ Play the game dealt from seed like rollout.play_game and append every step to writer """
+    game = engine.SpiderEngine(engine.shuffled_deck(seed))
+    rng = random.Random(seed)
+    mask = np.zeros(MASK_BITS, dtype=bool)
+    moves = game.legal_moves()
+    while moves and not game.game_over and game.no_of_moves_made < max_moves:
+        state = game.encode()
+        actions.legal_mask(game, mask)
+        move = policy(game, moves, rng)
+        action = actions.move_to_action(game, move)
+        score = game.score
+        game.apply(move)
+        moves = game.legal_moves()
+        done = not moves or game.game_over or game.no_of_moves_made >= max_moves
+        writer.append(state, mask, action, game.score - score, done)
+    return game
+
+
+def benchmark(directory=None, games=200, batch_size=256):
+    """ Time recording random games and reading shuffled minibatches back, in a temporary directory by default """
+    if directory is None:
+        with tempfile.TemporaryDirectory() as directory:
+            return benchmark(directory, games, batch_size)
+    start = time.perf_counter()
+    with TrajectoryWriter(directory, f"shard-{os.getpid()}") as writer:
+        for seed in range(games):
+            record_game(writer, seed, max_moves=500)
+    store = TrajectoryStore(directory)
+    elapsed = time.perf_counter() - start
+    print(f"{'record':>8} {len(store) / elapsed:10.0f} steps/sec ({len(store)} steps stored)")
+    start = time.perf_counter()
+    steps = sum(len(batch["action"]) for batch in store.minibatches(batch_size))
+    print(f"{'read':>8} {steps / (time.perf_counter() - start):10.0f} steps/sec")
+    start = time.perf_counter()
+    unique = store.unique_indices()
+    print(f"{'dedup':>8} {len(store) / (time.perf_counter() - start):10.0f} steps/sec ({len(unique)} distinct positions)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,264 @@
+"""
+Vectorized Spider environment that steps a batch of games with NumPy
+
+Actions are the ids of actions.py, the same as SpiderEnv's: one id per source
+pile, number of cards and target pile, and DEAL_ACTION to deal from the stock.
+"""
+import time
+
+import numpy as np
+import gymnasium as gym
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.utils import seeding
+
+import actions
+import deals
+import engine
+import settings
+
+# Marks an empty slot in a pile
+EMPTY = -1
+# Observation code of a face down card
+HIDDEN = engine.CARD_CODES
+PLAY_PILES = len(engine.TABLEAU)
+DEAL_ACTION = actions.DEAL_ACTION
+ACTION_COUNT = actions.ACTION_COUNT
+
+# Lookup tables indexed by card code + 1, so that EMPTY maps to the first entry
+_VALUE = np.array([-1] + engine.VALUE, dtype=np.int16)
+_NEXT_UP = np.array([-2] + engine.NEXT_UP, dtype=np.int16)
+
+
+def _deal_index(max_pile_len):
+    """ For every pile slot, the deck position the starting deal puts there, or -1 """
+    index = np.full((settings.PILE_COUNT, max_pile_len), -1, dtype=np.int16)
+    stock = np.arange(engine.DECK_SIZE)
+    for pile_no in engine.TABLEAU:
+        # Same order as SpiderEngine: cards are popped off the end of the deck
+        count = engine.DEAL_COUNTS[pile_no]
+        index[pile_no, :count] = stock[:-count - 1:-1]
+        stock = stock[:-count]
+    index[engine.STOCK, :len(stock)] = stock
+    return index
+
+
+class SpiderVecEnv(VectorEnv):
+    """
+    num_envs games of Spider kept in (num_envs, 12, max_pile_len) int8 arrays.
+    Legal moves, moves, completed suits and deals are computed for the whole batch at once.
+    The foundation pile holds the Ace of every completed suit.
+    """
+
+    metadata = {"autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(self, num_envs, max_pile_len=64, max_episode_steps=1000):
+        self.num_envs = num_envs
+        self.max_pile_len = max_pile_len
+        self.max_episode_steps = max_episode_steps
+
+        self.single_observation_space = gym.spaces.Box(
+            EMPTY, HIDDEN, (settings.PILE_COUNT, max_pile_len), np.int8)
+        self.single_action_space = gym.spaces.Discrete(ACTION_COUNT)
+        self.observation_space = gym.spaces.Box(
+            EMPTY, HIDDEN, (num_envs, settings.PILE_COUNT, max_pile_len), np.int8)
+        self.action_space = gym.spaces.MultiDiscrete(np.full(num_envs, ACTION_COUNT))
+
+        self.cards = np.full((num_envs, settings.PILE_COUNT, max_pile_len), EMPTY, dtype=np.int8)
+        self.lengths = np.zeros((num_envs, settings.PILE_COUNT), dtype=np.int16)
+        self.face_down = np.zeros((num_envs, settings.PILE_COUNT), dtype=np.int16)
+        self.score = np.zeros(num_envs, dtype=np.int32)
+        self.steps = np.zeros(num_envs, dtype=np.int32)
+        # Deal number of every game, engine.shuffled_deck(seed) deals the same game
+        self.seeds = np.zeros(num_envs, dtype=np.uint64)
+        # Legal action mask for the current states
+        self.action_mask = np.zeros((num_envs, ACTION_COUNT), dtype=bool)
+
+        self._deal_index = _deal_index(max_pile_len)
+        self._slots = np.arange(max_pile_len, dtype=np.int16)
+        self._window = np.arange(-engine.SUIT_LENGTH, 0, dtype=np.int16)
+        self._counts = np.arange(1, actions.MAX_RUN + 1, dtype=np.int16)
+        self._other_pile = ~np.eye(PLAY_PILES, dtype=bool)
+        self._batch = np.arange(num_envs)
+        self._autoreset = np.zeros(num_envs, dtype=bool)
+
+    def reset(self, *, seed=None, options=None):
+        """ Deal new shuffled games in every environment """
+        if seed is not None:
+            self._np_random, self._np_random_seed = seeding.np_random(seed)
+        self._deal(np.ones(self.num_envs, dtype=bool))
+        self._autoreset[:] = False
+        self._update_mask()
+        return self._observation(), {"action_mask": self.action_mask.copy()}
+
+    def step(self, actions):
+        """ Apply one action per environment; environments that ended last step are re-dealt instead """
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        resetting = self._autoreset.copy()
+        legal = self.action_mask[self._batch, actions] & ~resetting
+        before = self.score.copy()
+
+        moving = legal & (actions != DEAL_ACTION)
+        if moving.any():
+            self._move(self._batch[moving], actions[moving])
+        dealing = legal & (actions == DEAL_ACTION)
+        if dealing.any():
+            self._deal_row(self._batch[dealing])
+        self.steps[~resetting] += 1
+        rewards[:] = self.score - before
+
+        if resetting.any():
+            self._deal(resetting)
+        self._update_mask()
+
+        won = self.lengths[:, engine.FOUNDATION] == engine.DECK_SIZE // engine.SUIT_LENGTH
+        terminations = (won | ~self.action_mask.any(axis=1)) & ~resetting
+        truncations = (self.steps >= self.max_episode_steps) & ~terminations & ~resetting
+        self._autoreset = terminations | truncations
+        infos = {"action_mask": self.action_mask.copy(), "won": won}
+        return self._observation(), rewards, terminations, truncations, infos
+
+    def _deal(self, games):
+        """ Deal fresh shuffled games in the selected environments """
+        count = int(games.sum())
+        seeds = self.np_random.integers(0, 1 << 64, count, dtype=np.uint64)
+        self.seeds[games] = seeds
+        decks = deals.deal_batch(seeds).view(np.int8)
+        index = self._deal_index
+        cards = np.where(index >= 0, decks[:, index], EMPTY)
+        self.cards[games] = cards
+        self.lengths[games] = (index >= 0).sum(axis=1)
+        face_down = self.lengths[games] - 1
+        face_down[:, engine.STOCK] += 1
+        face_down[:, engine.FOUNDATION] = 0
+        self.face_down[games] = face_down
+        self.score[games] = settings.START_SCORE
+        self.steps[games] = 0
+
+    def _run_starts(self, games=slice(None)):
+        """ Start index of the movable run at the top of every play pile of the selected games """
+        lengths = self.lengths[games, :PLAY_PILES, None]
+        # A run is at most one suit long, so only the top 13 slots of each pile matter
+        slots = lengths + self._window
+        cards = np.take_along_axis(self.cards[games, :PLAY_PILES], np.maximum(slots, 0), axis=2).astype(np.int16)
+        # Is the card in the next slot part of a run with the card in this slot?
+        linked = cards[..., :-1] == _NEXT_UP[cards[..., 1:] + 1]
+        linked &= slots[..., :-1] >= np.maximum(self.face_down[games, :PLAY_PILES, None], 0)
+        linked &= slots[..., :-1] >= 0
+        starts = np.where(linked, slots[..., :1], slots[..., 1:]).max(axis=2)
+        return np.maximum(starts, 0)
+
+    def _tops(self, piles):
+        """ Card codes on top of the selected piles, EMPTY for empty piles """
+        lengths = self.lengths[:, piles]
+        tops = np.take_along_axis(self.cards[:, piles], np.maximum(lengths - 1, 0)[..., None], axis=2)[..., 0]
+        return np.where(lengths > 0, tops, EMPTY)
+
+    def _update_mask(self):
+        """ Recompute legal actions, indexed (game, source, count, target) like the action ids """
+        lengths = self.lengths[:, :PLAY_PILES]
+        run_lengths = lengths - self._run_starts()
+        top_values = _VALUE[self._tops(slice(0, PLAY_PILES)).astype(np.int16) + 1]
+        mask = self.action_mask[:, :DEAL_ACTION].reshape(self.num_envs, PLAY_PILES, actions.MAX_RUN, PLAY_PILES)
+
+        mask.fill(False)
+        # Any part of a run can fill an empty pile
+        empty = (run_lengths[:, :, None] > 0) & (lengths[:, None, :] == 0)
+        games, sources, targets = np.nonzero(empty)
+        mask[games, sources, :, targets] = self._counts <= run_lengths[games, sources, None]
+        # Only the part whose bottom card is one lower fits on a card
+        counts = top_values[:, None, :] - top_values[:, :, None]
+        legal = (counts >= 1) & (counts <= run_lengths[:, :, None]) & (lengths[:, None, :] > 0)
+        legal &= lengths[:, None, :] + counts <= self.max_pile_len
+        legal &= self._other_pile
+        games, sources, targets = np.nonzero(legal)
+        mask[games, sources, counts[games, sources, targets] - 1, targets] = True
+        self.action_mask[:, DEAL_ACTION] = (self.lengths[:, engine.STOCK] > 0) & (lengths < self.max_pile_len).all(axis=1)
+
+    def _move(self, games, action_ids):
+        """ Move runs between play piles, then flip cards and remove completed suits """
+        runs, targets = np.divmod(action_ids, PLAY_PILES)
+        sources, counts = np.divmod(runs, actions.MAX_RUN)
+        counts += 1
+        source_lengths = self.lengths[games, sources] - counts
+        target_lengths = self.lengths[games, targets]
+
+        offsets = np.arange(engine.SUIT_LENGTH)
+        moved = offsets < counts[:, None]
+        rows = np.broadcast_to(games[:, None], moved.shape)[moved]
+        from_piles = np.broadcast_to(sources[:, None], moved.shape)[moved]
+        to_piles = np.broadcast_to(targets[:, None], moved.shape)[moved]
+        from_slots = (source_lengths[:, None] + offsets)[moved]
+        to_slots = (target_lengths[:, None] + offsets)[moved]
+        self.cards[rows, to_piles, to_slots] = self.cards[rows, from_piles, from_slots]
+        self.cards[rows, from_piles, from_slots] = EMPTY
+        self.lengths[games, sources] = source_lengths
+        self.lengths[games, targets] += counts
+        self._flip(games, sources)
+
+        # Check if the move resulted in forming a stack
+        run_lengths = self.lengths[games, targets] - self._run_starts(games)[np.arange(len(games)), targets]
+        tops = self._tops(slice(0, PLAY_PILES))[games, targets]
+        completed = (run_lengths == engine.SUIT_LENGTH) & (_VALUE[tops.astype(np.int16) + 1] == 0)
+        if completed.any():
+            games, targets, tops = games[completed], targets[completed], tops[completed]
+            lengths = self.lengths[games, targets] - engine.SUIT_LENGTH
+            slots = lengths[:, None] + offsets
+            self.cards[games[:, None], targets[:, None], slots] = EMPTY
+            self.lengths[games, targets] = lengths
+            foundation = self.lengths[games, engine.FOUNDATION]
+            self.cards[games, engine.FOUNDATION, foundation] = tops
+            self.lengths[games, engine.FOUNDATION] += 1
+            self.score[games] += settings.STACK_POINTS
+            self._flip(games, targets)
+
+    def _flip(self, games, piles):
+        """ Turn the top card of the selected piles face up """
+        lengths = self.lengths[games, piles]
+        flipped = (self.face_down[games, piles] == lengths) & (lengths > 0)
+        self.face_down[games[flipped], piles[flipped]] -= 1
+        self.score[games[flipped]] += settings.FLIP_POINTS
+
+    def _deal_row(self, games):
+        """ Deal one card from the stock onto every non-empty play pile """
+        lengths = self.lengths[games, :PLAY_PILES]
+        stock_lengths = self.lengths[games, engine.STOCK]
+        # The first non-empty pile gets the top card of the stock, the next one the card below...
+        ranks = np.cumsum(lengths > 0, axis=1)
+        dealt = (lengths > 0) & (ranks <= stock_lengths[:, None])
+        rows, piles = np.nonzero(dealt)
+        games_dealt = games[rows]
+        stock_slots = stock_lengths[rows] - ranks[rows, piles]
+        self.cards[games_dealt, piles, lengths[rows, piles]] = self.cards[games_dealt, engine.STOCK, stock_slots]
+        self.cards[games_dealt, engine.STOCK, stock_slots] = EMPTY
+        self.lengths[games_dealt, piles] += 1
+        stock_lengths = stock_lengths - dealt.sum(axis=1)
+        self.lengths[games, engine.STOCK] = stock_lengths
+        self.face_down[games, engine.STOCK] = stock_lengths
+
+    def _observation(self):
+        """ The piles with face down cards hidden """
+        hidden = self._slots < self.face_down[..., None]
+        return np.where(hidden, np.int8(HIDDEN), self.cards)
+
+
+def benchmark(batch_sizes=(1, 16, 64, 256, 1024, 4096), steps=200, seed=0):
+    """ Print steps/sec of random legal play for each batch size """
+    rng = np.random.default_rng(seed)
+    print(f"{'batch':>6} {'steps/sec':>12}")
+    for num_envs in batch_sizes:
+        env = SpiderVecEnv(num_envs)
+        observations, infos = env.reset(seed=seed)
+        mask = infos["action_mask"]
+        start = time.perf_counter()
+        for step in range(steps):
+            # Pick a random legal action in every game
+            actions = np.argmax(rng.random(mask.shape) * mask, axis=1)
+            observations, rewards, terminations, truncations, infos = env.step(actions)
+            mask = infos["action_mask"]
+        elapsed = time.perf_counter() - start
+        print(f"{num_envs:>6} {num_envs * steps / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    benchmark()
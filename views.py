@@ -0,0 +1,901 @@
+"""
+The game's views: the table, the start and end screens and the move hints
+"""
+import arcade
+import cards
+import analysis
+import engine
+import layout
+import settings
+import solver
+import random
+import time
+import arcade.gui 
+from profiling import PROFILER, timed
+
+def format_time(total_time, hundredths=False):
+    """ Text of a time in seconds as minutes:seconds, or minutes:seconds:hundredths """
+    seconds = int(total_time)
+    text = f"{seconds // 60:02d}:{seconds % 60:02d}"
+    if hundredths:
+        text += f":{int((total_time - seconds) * 100):02d}"
+    return text
+
+
+class Hud:
+    """
+    Timer, score and game status text. A text is only laid out again when what it
+    shows changes: the timer when it ticks over at its resolution, the score and
+    status when a move or an analysis changes them.
+    """
+
+    def __init__(self):
+        self.timer_text = arcade.Text(
+            text=format_time(0, settings.TIMER_HUNDREDTHS),
+            start_x=settings.TIMER_X,
+            start_y=settings.TIMER_Y,
+            color=arcade.color.WHITE,
+            font_size=10,
+            anchor_x="center",
+        )
+        self.score_text = arcade.Text(
+            text="",
+            start_x=settings.TIMER_X,
+            start_y=settings.SCORE_Y,
+            color=arcade.color.WHITE,
+            font_size=10,
+            anchor_x="center",
+        )
+        # Game status, e.g. when the game can't be won any more
+        self.status_text = arcade.Text(
+            text="",
+            start_x=settings.TIMER_X,
+            start_y=settings.STATUS_Y,
+            color=arcade.color.WHITE,
+            font_size=10,
+            anchor_x="center",
+        )
+        #  timer steps, and score and moves, the texts show
+        self.shown_time = 0
+        self.shown_score = None
+        self.show_score(settings.START_SCORE, 0)
+
+    def show_time(self, total_time):
+        """ Show a game time, returning True if the timer text changed """
+        steps = int(total_time * 100) if settings.TIMER_HUNDREDTHS else int(total_time)
+        if steps == self.shown_time:
+            return False
+        self.shown_time = steps
+        self.timer_text.text = format_time(total_time, settings.TIMER_HUNDREDTHS)
+        return True
+
+    def show_score(self, score, moves):
+        """ Show a score and move count, returning True if the score text changed """
+        if (score, moves) == self.shown_score:
+            return False
+        self.shown_score = score, moves
+        self.score_text.text = f"Score: {score} Moves: {moves}"
+        return True
+
+    def show_status(self, status):
+        """ Show a game status, returning True if the status text changed """
+        if status == self.status_text.text:
+            return False
+        self.status_text.text = status
+        return True
+
+    def draw(self):
+        self.timer_text.draw()
+        self.score_text.draw()
+        self.status_text.draw()
+
+
+class GameClock:
+    """
+    Game time counted in fixed steps of settings.TIME_STEP. The real time between
+    updates is banked and paid out in whole steps, so the time, and the score worked
+    out from it, come out the same at any update rate.
+    """
+
+    def __init__(self, step=settings.TIME_STEP):
+        self.step = step
+        self.reset()
+
+    def reset(self):
+        self.steps = 0
+        self.banked = 0.0
+
+    def advance(self, delta_time):
+        """ Bank delta_time, returning the number of whole steps it completed """
+        self.banked += delta_time
+        steps = int(self.banked / self.step)
+        self.banked -= steps * self.step
+        self.steps += steps
+        return steps
+
+    @property
+    def time(self):
+        return self.steps * self.step
+
+
+class GameWindow(arcade.Window):
+    """
+    Window that skips frames nothing has changed in, while settings.IDLE_RENDERING
+    is on. A view with a needs_redraw() method is only drawn, and the window only
+    flipped, when it returns True. Other views are drawn every frame.
+    """
+
+    def __init__(self):
+        #  seconds between updates, set by arcade.Window's constructor
+        self.update_rate = None
+        #  was drawing the current frame skipped?
+        self.skipped = False
+        #  must the next frame be drawn whatever the view says, e.g. after the window was uncovered?
+        self.damaged = True
+        super().__init__(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT, settings.SCREEN_TITLE,
+                         update_rate=settings.UPDATE_RATE)
+
+    def dispatch_event(self, event_type, *args):
+        if event_type == "on_draw" and settings.IDLE_RENDERING:
+            needs_redraw = getattr(self.current_view, "needs_redraw", None)
+            if not self.damaged and needs_redraw is not None and not needs_redraw():
+                self.skipped = True
+                return False
+            self.damaged = False
+        return super().dispatch_event(event_type, *args)
+
+    def flip(self):
+        # The last frame drawn is still on screen
+        if self.skipped:
+            self.skipped = False
+            return
+        super().flip()
+
+    def set_update_rate(self, rate):
+        if rate != self.update_rate:
+            self.update_rate = rate
+            super().set_update_rate(rate)
+
+    def on_expose(self):
+        self.damaged = True
+
+    def on_resize(self, width, height):
+        super().on_resize(width, height)
+        self.damaged = True
+
+    def on_show(self):
+        self.damaged = True
+
+
+class GameView(arcade.View):
+    """ Main application class. """
+
+    def __init__(self):
+        super().__init__()
+        self.game_over = False
+        # History
+        self.no_of_moves_made = 0
+        # Creating a UI MANAGER to handle the UI 
+        self.uimanager = arcade.gui.UIManager() 
+        self.uimanager.enable()
+        # Creating Button using UIFlatButton 
+        button = arcade.gui.UIFlatButton(text="Show moves", 
+                                               width=100) 
+        # Creating Undo Button using UIFlatButton 
+        undo_button = arcade.gui.UIFlatButton(text="Undo", 
+                                               width=100)
+        # Creating Redo Button using UIFlatButton 
+        redo_button = arcade.gui.UIFlatButton(text="Redo", 
+                                               width=100)
+        # Adding button in our uimanager 
+        self.uimanager.add( 
+            arcade.gui.UIAnchorWidget( 
+                anchor_x="right", 
+                anchor_y="bottom", 
+                child=button))
+        
+        # Adding undo button in our uimanager 
+        self.uimanager.add( 
+            arcade.gui.UIAnchorWidget( 
+                anchor_x="right", 
+                anchor_y="bottom",
+                align_x=-200,
+                child=undo_button))
+
+        # Adding redo button in our uimanager 
+        self.uimanager.add( 
+            arcade.gui.UIAnchorWidget( 
+                anchor_x="right", 
+                anchor_y="bottom",
+                align_x=-100,
+                child=redo_button))
+        
+        @button.event("on_click")
+        def on_click_moves(event):
+            # Search for the best few moves in the background, on_update shows them
+            self.analysis.request_hint(self.engine)
+            self.hint_requested = True
+        
+        @undo_button.event("on_click")
+        def on_click_undo(event):
+            self.undo()
+
+        @redo_button.event("on_click")
+        def on_click_redo(event):
+            self.redo()
+
+        # Timer set up
+        self.total_time = 0.0
+        self.clock = GameClock()
+        # Score set up
+        self.score = settings.START_SCORE
+        # Timer, score and game status text
+        self.hud = Hud()
+        # Profiler overlay, shown while the profiler runs (P key)
+        self.profile_text = arcade.Text(
+            text="",
+            start_x=settings.START_X + settings.MAT_WIDTH,
+            start_y=settings.BOTTOM_Y - settings.MAT_HEIGHT / 2,
+            color=arcade.color.WHITE,
+            font_size=9,
+            font_name=("Courier New", "DejaVu Sans Mono", "Courier", "monospace"),
+            multiline=True,
+            width=560,
+            anchor_y="bottom",
+        )
+        #  time until the overlay is refreshed
+        self.profile_refresh = 0.0
+        #  list of cards
+        self.card_list = None
+        # Load every card texture up front, so flipping a card only swaps textures
+        cards.load_textures(self.window.ctx.default_atlas)
+        arcade.set_background_color(settings.TABLE_COLOR)
+        #  cards being dragged
+        self.held_cards = None
+        #  og location
+        self.held_cards_og_pos = None
+        #  mats
+        self.pile_mat_list = None
+        #  a list of lists for each pile
+        self.piles = None
+        #  (pile index, position in pile) of every card
+        self.card_locations = None
+        #  rules engine the piles mirror
+        self.engine = None
+        #  number of the deal being played
+        self.seed = None
+        #  background hint search and dead game check
+        self.analysis = analysis.shared_service()
+        #  is the "Show moves" button waiting for a hint?
+        self.hint_requested = False
+        #  has the background check found that the game can't be won any more?
+        self.game_stuck = False
+        #  do the cards need sorting into drawing order before the next draw?
+        self.draw_order_changed = False
+        #  has anything shown changed since the last frame was drawn?
+        self.redraw = True
+        #  seconds since the player last did anything, and are updates slowed down for now?
+        self.idle_time = 0.0
+        self.throttled = False
+
+    def setup(self, seed=None):
+        """
+        Set up the game here. Call this function to restart the game.
+        seed picks the deal, a random one if None.
+        """
+        self.game_over = False
+        # Timer
+        self.clock.reset()
+        self.total_time = 0.0
+        self.hud.show_time(self.total_time)
+        self.changed()
+        # Score
+        self.score = settings.START_SCORE
+        #  cards being dragged
+        self.held_cards = []
+        self.held_cards_og_pos = []
+        # History
+        self.no_of_moves_made = 0
+
+        # ---  Create the mats the cards go on.
+
+        # Sprite list with all the mats tha cards lay on.
+        self.pile_mat_list: arcade.SpriteList = arcade.SpriteList()
+
+        # Create the 10 play piles, the bottom face down pile and the foundation pile
+        for position in layout.MAT_POSITIONS:
+            pile = arcade.SpriteSolidColor(settings.MAT_WIDTH, settings.MAT_HEIGHT, settings.MAT_COLOR)
+            pile.position = position
+            self.pile_mat_list.append(pile)
+
+        # Sprite list with all the cards, no matter what pile they are in.
+        self.card_list = arcade.SpriteList()
+
+        # Shuffle the cards
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        deck = engine.shuffled_deck(seed, settings.SUIT_COUNT)
+
+        # Create every card, in the order of the shuffled deck
+        for code in deck:
+            card_suit = settings.CARD_SUITS[engine.SUIT[code]]
+            card_value = settings.CARD_VALUES[engine.VALUE[code]]
+            card = cards.Card(card_suit, card_value, settings.CARD_SCALE)
+            self.card_list.append(card)
+
+        # The rules engine deals the cards, then the sprites go where it put them
+        self.engine = engine.SpiderEngine(deck)
+        self.rebuild_piles()
+
+        self.position_changed()
+
+        # Load the start view
+        start_screen = StartView(self)
+        self.window.show_view(start_screen)          
+
+    def rebuild_piles(self):
+        """
+        Put the card sprites in the piles, places and faces the engine has, reusing
+        the sprite of a card with the same code. Used after a deal or a restore.
+        """
+        spares = {}
+        for card in self.card_list:
+            spares.setdefault(card.code, []).append(card)
+        self.piles = [[] for x in range(settings.PILE_COUNT)]
+        self.card_locations = {}
+        for pile_index, codes in enumerate(self.engine.piles):
+            for code in codes:
+                self.add_card_to_pile(spares[code].pop(), pile_index)
+            self.layout_pile(pile_index)
+        self.update_status()
+
+    def snapshot(self):
+        """ Compact record of the game being played, see SpiderEngine.snapshot() """
+        return self.engine.snapshot()
+
+    def restore(self, snapshot):
+        """ Go back to a snapshot() of this deal, rebuilding the card sprites from it """
+        self.held_cards = []
+        self.engine.restore(snapshot)
+        self.rebuild_piles()
+        self.position_changed()
+
+    def sort_cards(self):
+        """
+        Put the cards in drawing order if a pile changed: higher in a pile is drawn
+        later (looks on top) and held cards are drawn last. Piles don't overlap, so
+        their order doesn't matter. One sort rewrites the draw order in a single update.
+        """
+        if not self.draw_order_changed:
+            return
+        held = set(self.held_cards)
+        locations = self.card_locations
+        self.card_list.sort(key=lambda card: locations[card][1] + (engine.DECK_SIZE if card in held else 0))
+        self.draw_order_changed = False
+
+    @timed("GameView.on_draw")
+    def on_draw(self):
+        """ Render the screen. """
+        PROFILER.new_frame()
+        #  Clear the screen
+        self.clear()
+        #  draw mats
+        with PROFILER.timer("draw mats"):
+            self.pile_mat_list.draw()
+        with PROFILER.timer("draw text"):
+            # Draw timer, score and game status
+            self.hud.draw()
+        #  draw cards
+        with PROFILER.timer("draw cards"):
+            self.sort_cards()
+            self.card_list.draw()
+        # Drawing our ui manager 
+        with PROFILER.timer("draw ui"):
+            self.uimanager.draw() 
+        if PROFILER.enabled:
+            self.profile_text.draw()
+        self.redraw = False
+
+    def needs_redraw(self):
+        """ Does the next frame differ from the one on screen? Asked by GameWindow """
+        return self.redraw or bool(self.held_cards) or PROFILER.enabled
+
+    def changed(self):
+        """ The player did something: draw the next frame and go back to the full update rate """
+        self.redraw = True
+        self.idle_time = 0.0
+        if self.throttled:
+            self.throttled = False
+            self.window.set_update_rate(settings.UPDATE_RATE)
+
+    def on_show_view(self):
+        self.changed()
+
+    @timed("GameView.on_mouse_press")
+    def on_mouse_press(self, x, y, button, key_modifiers):
+        """ Called when the user presses a mouse button. """
+        self.changed()
+        # The card drawn on top under the pointer, found from the layout
+        hit = layout.card_at(x, y, self.piles)
+        
+        # Have we clicked on a card?
+        if hit is not None:
+            pile_index, card_index = hit
+
+            # Are we clicking on the bottom deck, to deal cards on top?
+            if pile_index == settings.BOTTOM_FACE_DOWN_PILE:
+                self.play(engine.DEAL)
+
+            elif pile_index in engine.TABLEAU:
+                # Grab the card and everything on top of it, if the engine says it is a movable run
+                if card_index >= self.engine.run_start(pile_index):
+                    self.held_cards = self.piles[pile_index][card_index:]
+                    # Save the position
+                    self.held_cards_original_position = [card.position for card in self.held_cards]
+                    # Put on top in drawing order
+                    self.draw_order_changed = True
+
+    @timed("GameView.play")
+    def play(self, move):
+        """ Make a move in the rules engine and mirror it on the card sprites """
+        with PROFILER.timer("SpiderEngine.push"):
+            outcome = self.engine.push(move)
+        self.mirror(move, outcome)
+        self.position_changed()
+
+    @timed("GameView.undo")
+    def undo(self):
+        """ Take back the last move """
+        if self.engine.log:
+            with PROFILER.timer("SpiderEngine.pop"):
+                move, outcome = self.engine.pop()
+            self.unmirror(move, outcome)
+            self.position_changed()
+
+    @timed("GameView.redo")
+    def redo(self):
+        """ Make the last move taken back again """
+        if self.engine.redo_log:
+            with PROFILER.timer("SpiderEngine.redo"):
+                move, outcome = self.engine.redo()
+            self.mirror(move, outcome)
+            self.position_changed()
+
+    def position_changed(self):
+        """ Drop analyses of the old position and check in the background if the new one can be won """
+        self.analysis.new_generation()
+        self.hint_requested = False
+        self.game_stuck = False
+        self.analysis.request_solve(self.engine)
+        self.changed()
+
+    def mirror(self, move, outcome):
+        """ Move the card sprites the way the engine just made a move """
+        source, index, target = move
+        if source == settings.BOTTOM_FACE_DOWN_PILE:
+            # The dealt cards went to the first piles that have cards
+            receivers = [pile_index for pile_index in engine.TABLEAU if self.piles[pile_index]][:outcome.count]
+            for pile_index in receivers:
+                self.move_card_to_new_pile(self.piles[source][-1], pile_index)
+                self.layout_pile(pile_index, len(self.piles[pile_index]) - 1)
+        else:
+            self.move_cards_to_new_pile(source, index, target)
+            self.layout_pile(source, max(index - 1, 0))
+            if outcome.completed:
+                print("Stack completed")
+                # Remove stack from game, Ace first
+                for card in self.piles[target][:-engine.SUIT_LENGTH - 1:-1]:
+                    self.move_card_to_new_pile(card, settings.FOUNDATION_PILE)
+                self.layout_pile(settings.FOUNDATION_PILE, len(self.piles[settings.FOUNDATION_PILE]) - engine.SUIT_LENGTH)
+            self.layout_pile(target, max(len(self.piles[target]) - (0 if outcome.completed else outcome.count) - 1, 0))
+        self.update_status()
+
+    def unmirror(self, move, outcome):
+        """ Move the card sprites the way the engine just took back a move """
+        source, index, target = move
+        if source == settings.BOTTOM_FACE_DOWN_PILE:
+            receivers = [pile_index for pile_index in engine.TABLEAU if self.piles[pile_index]][:outcome.count]
+            for pile_index in reversed(receivers):
+                self.move_card_to_new_pile(self.piles[pile_index][-1], source)
+            self.layout_pile(source, len(self.piles[source]) - outcome.count)
+        else:
+            target_pile = self.piles[target]
+            start = max(len(target_pile) - 1, 0)
+            if outcome.completed:
+                # Put the stack back, King first
+                for card in self.piles[settings.FOUNDATION_PILE][:-engine.SUIT_LENGTH - 1:-1]:
+                    self.move_card_to_new_pile(card, target)
+            self.move_cards_to_new_pile(target, len(target_pile) - outcome.count, source)
+            self.layout_pile(target, start)
+            self.layout_pile(source, max(index - 1, 0))
+        self.update_status()
+
+    def layout_pile(self, pile_index, start=0):
+        """
+        Position, turn and raise in draw order the cards of a pile from start upwards,
+        as the engine says the pile looks
+        """
+        pile = self.piles[pile_index]
+        face_down = self.engine.face_down[pile_index]
+        for i in range(start, len(pile)):
+            card = pile[i]
+            card.position = layout.card_position(pile_index, i)
+            if i < face_down:
+                if card.is_face_up:
+                    card.face_down()
+            elif card.is_face_down:
+                card.face_up()
+        self.draw_order_changed = True
+
+    def update_status(self):
+        """ Copy score, move count and game over from the engine """
+        self.score = self.engine.score
+        self.game_over = self.engine.game_over
+        self.no_of_moves_made = self.engine.no_of_moves_made
+        self.hud.show_score(self.score, self.no_of_moves_made)
+
+    @timed("GameView.on_mouse_release")
+    def on_mouse_release(self, x: float, y: float, button: int, modifiers: int):
+        """ Called when the user presses a mouse button. """
+        self.changed()
+        # If we don't have any cards, who cares
+        if len(self.held_cards) == 0:
+            return
+        
+        # Find the pile under the held cards, the nearest column if we are in contact with more than one
+        card = self.held_cards[0]
+        pile_index = layout.drop_target(card.center_x, card.center_y, self.piles)
+        reset_position = True
+
+        #  the pile from where the clicked card came from
+        last_pile_index = self.get_pile_for_card(card)
+        move = (last_pile_index, self.get_position_in_pile(card), pile_index)
+
+        # See if we are in contact with a pile and in accordance with the rules
+        if pile_index is not None and self.engine.is_legal(move):
+            # The cards are laid out on the new pile by play()
+            self.play(move)
+            # Success, don't reset position of cards
+            reset_position = False
+
+        if reset_position:
+            # Where-ever we were dropped, it wasn't valid. Reset the each card's position
+            # to its original spot.
+            for pile_index, card in enumerate(self.held_cards):
+                card.position = self.held_cards_original_position[pile_index]
+
+        # We are no longer holding cards
+        self.held_cards = []
+        self.draw_order_changed = True
+
+    @timed("GameView.on_mouse_motion")
+    def on_mouse_motion(self, x: float, y: float, dx: float, dy: float):
+        """ User moves mouse """
+        # The buttons light up under the pointer
+        self.changed()
+
+        # If we are holding cards, move them with the mouse
+        for card in self.held_cards:
+            card.center_x += dx
+            card.center_y += dy
+
+    def get_pile_for_card(self, card):
+        """ What pile is this card in? """
+        return self.card_locations[card][0]
+
+    def get_position_in_pile(self, card):
+        """ How many cards lie below this card in its pile? """
+        return self.card_locations[card][1]
+
+    def add_card_to_pile(self, card, pile_index):
+        """ Put a card on top of a pile """
+        pile = self.piles[pile_index]
+        self.card_locations[card] = (pile_index, len(pile))
+        pile.append(card)
+
+    def remove_card_from_pile(self, card):
+        """ Remove card from whatever pile it was in. """
+        pile_index, position = self.card_locations.pop(card)
+        pile = self.piles[pile_index]
+        del pile[position]
+        # Cards that were on top of it move down one place
+        for i in range(position, len(pile)):
+            self.card_locations[pile[i]] = (pile_index, i)
+
+    def move_card_to_new_pile(self, card, pile_index):
+        """ Move the card to a new pile """
+        self.remove_card_from_pile(card)
+        self.add_card_to_pile(card, pile_index)
+
+    def move_cards_to_new_pile(self, pile_index, position, new_pile_index):
+        """ Move the card at position and every card on top of it to a new pile in one go """
+        pile = self.piles[pile_index]
+        cards = pile[position:]
+        del pile[position:]
+        new_pile = self.piles[new_pile_index]
+        for i, card in enumerate(cards, len(new_pile)):
+            self.card_locations[card] = (new_pile_index, i)
+        new_pile.extend(cards)
+
+    def on_key_press(self, symbol: int, modifiers: int):
+        """ User presses key """
+        self.changed()
+        if symbol == arcade.key.R:
+            # Restart
+            self.setup()
+        elif symbol == arcade.key.P:
+            self.toggle_profiler()
+
+    def toggle_profiler(self):
+        """ Start profiling with the overlay shown, or stop and save the trace """
+        if PROFILER.enabled:
+            PROFILER.disable()
+            print(f"Profile saved to {PROFILER.save(settings.PROFILE_FILE)}")
+        else:
+            PROFILER.enable()
+            self.profile_refresh = 0.0
+
+    def advance_time(self, delta_time):
+        """ Add to the game time, the timer text changes when the time shown does """
+        if self.clock.advance(delta_time):
+            self.total_time = self.clock.time
+            if self.hud.show_time(self.total_time):
+                self.redraw = True
+
+    @timed("GameView.on_update")
+    def on_update(self, delta_time):
+        # Accumulate the total time
+        self.advance_time(delta_time)
+        # Collect background analyses of the current position
+        for result in self.analysis.poll():
+            PROFILER.count(f"analysis {result.kind} results")
+            if result.error is not None:
+                print(f"Analysis failed: {result.error!r}")
+                if result.kind == analysis.HINT:
+                    self.hint_requested = False
+            elif result.kind == analysis.HINT and self.hint_requested:
+                self.hint_requested = False
+                screen = MovesView(self, self.get_hint_moves(result.result))
+                self.window.show_view(screen)
+            elif result.kind == analysis.SOLVE and result.result.status == solver.STUCK:
+                # Only a search that ran out of moves says STUCK, running out of time is UNKNOWN
+                self.game_stuck = True
+        if self.hud.show_status("Can't be won" if self.game_stuck else ""):
+            self.redraw = True
+        # Refresh the profiler overlay a few times a second
+        if PROFILER.enabled:
+            self.profile_refresh -= delta_time
+            if self.profile_refresh <= 0:
+                self.profile_text.text = PROFILER.report()
+                self.profile_refresh = settings.PROFILE_REFRESH
+        # Check if the game is over
+        if self.game_over and len(self.piles[settings.FOUNDATION_PILE]) == 104:
+            print("Game is done")
+            self.score += 1000000/self.total_time
+            # Load the end view
+            end_screen = EndView(self)
+            self.window.show_view(end_screen)
+        elif settings.IDLE_RENDERING:
+            # Update less often once nothing has happened for a while
+            if self.held_cards or self.hint_requested or PROFILER.enabled:
+                self.idle_time = 0.0
+            else:
+                self.idle_time += delta_time
+            if self.idle_time >= settings.IDLE_DELAY and not self.throttled:
+                self.throttled = True
+                self.window.set_update_rate(settings.IDLE_UPDATE_RATE)
+
+    @timed("GameView.get_hint_moves")
+    def get_hint_moves(self, result):
+        """
+        Like get_possible_moves, but only for the settings.HINT_COUNT best moves of a
+        hints.HintResult, best first. Dealing is shown on the bottom pile.
+        """
+        hint_moves = {}
+        for ranked_move in result.moves[:settings.HINT_COUNT]:
+            source, index, target = ranked_move.move
+            if source == settings.BOTTOM_FACE_DOWN_PILE:
+                hint_moves.setdefault(self.piles[source][-1], []).append(self.pile_mat_list[source])
+                continue
+            if self.piles[target]:
+                place = self.piles[target][-1]
+            else:
+                place = self.pile_mat_list[target]
+            hint_moves.setdefault(self.piles[source][index], []).append(place)
+        return hint_moves
+
+    @timed("GameView.get_possible_moves")
+    def get_possible_moves(self):
+        """
+        Returns a dictionray of possible moves. The key is the card that can be played. 
+        The item is a list of cards, or mats of empty piles, that the key card can be placed on.
+        """
+        possible_moves = {}
+        with PROFILER.timer("SpiderEngine.legal_moves"):
+            moves = self.engine.legal_moves()
+        for source, index, target in moves:
+            # Dealing is always shown by the bottom pile itself
+            if source == settings.BOTTOM_FACE_DOWN_PILE:
+                continue
+            playable_card = self.piles[source][index]
+            if self.piles[target]:
+                place = self.piles[target][-1]
+            else:
+                place = self.pile_mat_list[target]
+            possible_moves.setdefault(playable_card, []).append(place)
+        return possible_moves
+    
+class StartView(arcade.View):
+    """ View to show before the game starts """
+    def __init__(self, game_view):
+        super().__init__()
+        self.game_view = game_view
+        # Laid out once, drawing an arcade.Text is much cheaper than arcade.draw_text
+        self.text = arcade.Text("Click to start",
+                                settings.SCREEN_WIDTH / 2,
+                                settings.SCREEN_HEIGHT / 2,
+                                arcade.color.BLACK,
+                                font_size=20,
+                                anchor_x="center")
+    
+    def on_show_view(self):
+        arcade.set_background_color(settings.TABLE_COLOR)
+
+    def on_draw(self):
+        self.game_view.on_draw()
+        self.text.draw()
+
+    def on_mouse_press(self, _x, _y, _button, _modifiers):
+        """ If the user presses the mouse button, start the game. """
+        self.window.show_view(self.game_view)
+
+class EndView(arcade.View):
+    """ View to show when the game ends """
+    def __init__(self, game_view):
+        super().__init__()
+        self.game_view = game_view
+        # The score and time are final, so the text is laid out once
+        self.text = arcade.Text("Click to re-start the game. "
+                                "Your score was {} with time {}".format(int(game_view.score),
+                                                                        format_time(game_view.total_time, True)),
+                                settings.SCREEN_WIDTH / 2,
+                                settings.SCREEN_HEIGHT / 2,
+                                arcade.color.BLACK,
+                                font_size=20,
+                                multiline=True,
+                                anchor_x="center",
+                                width=375)
+
+    def on_show_view(self):
+        arcade.set_background_color(settings.TABLE_COLOR)
+
+    def on_draw(self):
+        #  draw mats
+        self.game_view.pile_mat_list.draw()
+        # Draw timer and score
+        self.game_view.hud.draw()
+        #  draw cards
+        self.game_view.card_list.draw()
+        self.text.draw()
+    
+    def on_mouse_press(self, _x, _y, _button, _modifiers):
+        """ If the user presses the mouse button, re-start the game. """
+        game = GameView()
+        game.setup()
+        self.window.show_view(game)
+
+class MovesView(arcade.View):
+    """View for displaying the best moves to a player"""
+    def __init__(self, game_view, possible_moves):
+        super().__init__()
+        self.game_view = game_view
+        self.moves = possible_moves
+        self.time_span = 3
+        self.total_time = 0
+        self.shown_moves = {}
+        self.item = None
+        self.key = None
+
+    def on_show_view(self):
+        arcade.set_background_color(settings.TABLE_COLOR)
+
+    def on_draw(self):
+        self.clear()
+        #  draw mats
+        self.game_view.pile_mat_list.draw()
+        # Draw timer and score
+        self.game_view.hud.draw()
+        #  draw cards
+        self.game_view.card_list.draw()
+
+        if self.item is not None and self.key is not None and self.key !=self.item:
+            # Draw an orange rectangle on position to place key
+            arcade.draw_rectangle_outline(self.item.position[0],
+                                        self.item.position[1], 
+                                        width=settings.CARD_WIDTH+3,
+                                        height=settings.CARD_HEIGHT+3,
+                                        color=arcade.color.RED,
+                                        border_width=3)
+            # Draw an yellow rectangle around key
+            arcade.draw_rectangle_outline(self.key.position[0],
+                                        self.key.position[1], 
+                                        width=settings.CARD_WIDTH+3,
+                                        height=settings.CARD_HEIGHT+3,
+                                        color=arcade.color.YELLOW,
+                                        border_width=3)
+    
+    def on_update(self, delta_time: float):
+        # Take the first value pair in the moves dict
+        if self.moves.keys():
+            key = list(self.moves.keys())[0]
+            # list of possible new positions
+            items = self.moves[key]
+            # Draw the possible move
+            if items and self.time_span > 3:
+                # Take a single possible move
+                item = items.pop(0)
+                self.item = item
+                self.key = key
+                # Draw that move
+                self.on_draw()
+                # Reset timer
+                self.time_span = 0
+            if not items and self.time_span > 3:
+                # No more moves for that key. Remove from dict
+                self.moves.pop(key)
+        else: 
+            # No more moves to show. Switch back to game
+            self.window.show_view(self.game_view)
+
+        self.time_span += delta_time
+        # Update game timer
+        self.game_view.advance_time(delta_time)
+                
+    def on_mouse_press(self, _x, _y, _button, _modifiers):
+        """ If the user presses the mouse button, stop showing possible moves. """
+        self.window.show_view(self.game_view)
+
+
+def benchmark(repeat=2000, seed=0):
+    """
+    Time putting the cards back in drawing order after picking up a pile and
+    dropping it, and after a deal and its undo, in a hidden window. Only the
+    reordering is timed, not the moves.
+    """
+    window = arcade.Window(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT, settings.SCREEN_TITLE, visible=False)
+    view = GameView()
+    window.show_view(view)
+    view.setup(seed)
+    window.show_view(view)
+    for x in range(2):
+        view.play(engine.DEAL)
+    view.sort_cards()
+
+    def timed_sort():
+        view.draw_order_changed = True
+        start = time.perf_counter()
+        view.sort_cards()
+        return time.perf_counter() - start
+
+    def pick_up():
+        view.held_cards = view.piles[0][:]
+        elapsed = timed_sort()
+        view.held_cards = []
+        return elapsed + timed_sort()
+
+    def deal_undo():
+        view.play(engine.DEAL)
+        elapsed = timed_sort()
+        view.undo()
+        return elapsed + timed_sort()
+
+    for name, operation in [(f"pick up and drop {len(view.piles[0])} cards", pick_up),
+                            ("deal and undo", deal_undo)]:
+        elapsed = sum(operation() for x in range(repeat))
+        print(f"{name:>28} {elapsed / repeat * 1e6:8.1f} us")
+    window.close()
+
+
+if __name__ == "__main__":
+    benchmark()
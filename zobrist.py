@@ -0,0 +1,87 @@
+"""
+Zobrist hashing of Spider positions and a bounded transposition table
+"""
+import random
+from collections import OrderedDict
+
+import settings
+
+# Number of distinct card codes, and the most cards a pile can ever hold
+CODES = len(settings.CARD_SUITS) * len(settings.CARD_VALUES)
+SLOTS = 2 * CODES
+
+_random = random.Random(0x5B1D)
+# One 64-bit key per (pile, slot, card code), indexed (pile * SLOTS + slot) * CODES + code
+CARD_KEYS = [_random.getrandbits(64) for x in range(settings.PILE_COUNT * SLOTS * CODES)]
+# One key per (pile, number of face down cards), indexed pile * (SLOTS + 1) + count
+FACE_DOWN_KEYS = [_random.getrandbits(64) for x in range(settings.PILE_COUNT * (SLOTS + 1))]
+
+
+def card_key(pile_no, slot, code):
+    """ Key of a card lying in a slot of a pile """
+    return CARD_KEYS[(pile_no * SLOTS + slot) * CODES + code]
+
+
+def run_key(pile_no, slot, codes):
+    """ Combined key of cards lying in a pile from slot upwards """
+    key = 0
+    index = (pile_no * SLOTS + slot) * CODES
+    for code in codes:
+        key ^= CARD_KEYS[index + code]
+        index += CODES
+    return key
+
+
+def face_down_key(pile_no, count):
+    """ Key of a pile having count face down cards """
+    return FACE_DOWN_KEYS[pile_no * (SLOTS + 1) + count]
+
+
+def position_key(piles, face_down):
+    """ Key of a whole position, computed from scratch """
+    key = 0
+    for pile_no, pile in enumerate(piles):
+        key ^= run_key(pile_no, 0, pile) ^ face_down_key(pile_no, face_down[pile_no])
+    return key
+
+
+class TranspositionTable:
+    """
+    Bounded map from position keys to whatever a search wants to remember about them.
+    When full, the least recently used entry is dropped.
+    """
+
+    def __init__(self, capacity=1 << 20):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """ Look up a position, marking it as recently used """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, entry):
+        """ Remember an entry for a position """
+        entries = self.entries
+        entries[key] = entry
+        entries.move_to_end(key)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)